@@ -3,13 +3,13 @@ PTZ module for Synology Surveillance Station.
 Handles PTZ camera movement and preset operations.
 """
 
-import requests
-from pynput import keyboard
 import threading
-from config import BASE_URL, CAMERA_API_PATH
+from config import CAMERA_API_PATH
+from client import api_get
+from decoding import decode_response
 
 
-def show_preset(sid, camId):
+def show_preset(sid, camId, nas=None):
     """Get list of PTZ presets for a camera."""
     params = {
         'api': 'SYNO.SurveillanceStation.PTZ',
@@ -20,9 +20,9 @@ def show_preset(sid, camId):
     }
     
     try:
-        response = requests.get(f"{BASE_URL}{CAMERA_API_PATH}", params=params, timeout=10, verify=False)
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = decode_response(response)
         
         if data.get('success'):
             presets = data['data'].get('presets', [])
@@ -38,16 +38,21 @@ def show_preset(sid, camId):
 
 
 class PTZController:
-    """Interactive PTZ camera controller using keyboard input."""
+    """Interactive PTZ camera controller using keyboard input.
+
+    pynput needs a display, so it is imported only by the keyboard handling;
+    ptz_move() works on headless hosts too.
+    """
     
-    def __init__(self, sid, cam_id):
+    def __init__(self, sid, cam_id, nas=None):
         self.sid = sid
         self.cam_id = cam_id
+        self.nas = nas
         self.active_direction = None
         self.lock = threading.Lock()
     
     def ptz_move(self, direction, move_type):
-        """Send PTZ move command to camera."""
+        """Send PTZ move command to camera; returns True on success."""
         params = {
             'api': 'SYNO.SurveillanceStation.PTZ',
             'method': 'Move',
@@ -60,26 +65,26 @@ class PTZController:
         }
         
         try:
-            response = requests.get(
-                f"{BASE_URL}{CAMERA_API_PATH}", 
-                params=params, 
-                timeout=10, 
-                verify=False)
+            response = api_get(CAMERA_API_PATH, params, nas=self.nas, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = decode_response(response)
             
             if data.get('success'):
                 print(f"[INFO] PTZ Move {direction} ({move_type})")
+                return True
             else:
                 errno = data.get('error', {}).get('code')
                 print(f"[ERROR] PTZ move failed with "
                       f"API code: {errno}")
+                return False
                 
         except Exception as e:
             print(f"[ERROR] PTZ move failed: {e}")
+            return False
     
     def on_press(self, key):
         """Handle key press events."""
+        from pynput import keyboard
         with self.lock:
             try:
                 # WASD keys
@@ -116,6 +121,7 @@ class PTZController:
     
     def on_release(self, key):
         """Handle key release events."""
+        from pynput import keyboard
         with self.lock:
             should_stop = False
             
@@ -142,6 +148,7 @@ class PTZController:
     
     def start(self):
         """Start the PTZ controller."""
+        from pynput import keyboard
         print("\n" + "=" * 50)
         print("PTZ CONTROLLER".center(50))
         print("=" * 50)
@@ -159,7 +166,7 @@ class PTZController:
             listener.join()
 
 
-def ptz_controller(sid, cam_id):
+def ptz_controller(sid, cam_id, nas=None):
     """Initialize and start PTZ controller."""
-    controller = PTZController(sid, cam_id)
+    controller = PTZController(sid, cam_id, nas=nas)
     controller.start()
@@ -0,0 +1,172 @@
+"""
+Snapshot archive module for Synology Surveillance Station.
+Packs snapshots into an append-only data file with a fixed-width, mmap-read index.
+"""
+
+import base64
+import bisect
+import mmap
+import os
+import struct
+
+
+# Index record: camera ID, timestamp, offset in data file, length of JPEG blob
+INDEX_RECORD = struct.Struct('<IqQI')
+
+
+class _TimestampView:
+    """Sequence view over the index timestamps, for bisect without unpacking everything."""
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    def __len__(self):
+        return len(self.archive)
+
+    def __getitem__(self, i):
+        return self.archive.record(i)[1]
+
+
+class SnapshotArchive:
+    """Append-only snapshot archive: <path>.dat holds JPEG blobs, <path>.idx the index.
+
+    Records must be appended in non-decreasing timestamp order so lookups by
+    time can binary-search the index. Frames returned by read() are
+    memoryviews into the mapped data file; they stay valid after refresh()
+    and close(), which leave still-viewed maps to be freed with the views.
+    """
+
+    def __init__(self, path):
+        self.data_path = path + '.dat'
+        self.index_path = path + '.idx'
+        self.data_file = None
+        self.index_file = None
+        self.data_map = None
+        self.index_map = None
+        self.count = 0
+        self.last_ts = None
+        self.refresh()
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def refresh(self):
+        """Map the current files again, picking up records appended since."""
+        self._unmap()
+        self.data_map = _map_file(self.data_path)
+        self.index_map = _map_file(self.index_path)
+        # A partially written trailing record is ignored
+        self.count = len(self.index_map) // INDEX_RECORD.size if self.index_map else 0
+        self.last_ts = self.record(self.count - 1)[1] if self.count else None
+
+    def append(self, camera_id, timestamp, jpeg_bytes):
+        """Append one JPEG frame; returns its record number."""
+        if self.last_ts is not None and timestamp < self.last_ts:
+            raise ValueError(f"Timestamp {timestamp} is older than the last archived frame")
+
+        if self.data_file is None:
+            self.data_file = open(self.data_path, 'ab')
+            self.index_file = open(self.index_path, 'ab')
+            # Drop a partial record left by a crash so new records stay aligned
+            self.index_file.truncate(self.count * INDEX_RECORD.size)
+
+        offset = self.data_file.seek(0, os.SEEK_END)
+        self.data_file.write(jpeg_bytes)
+        self.data_file.flush()
+        # Index is written after the data so a crash never leaves a dangling record
+        self.index_file.write(INDEX_RECORD.pack(camera_id, timestamp, offset, len(jpeg_bytes)))
+        self.index_file.flush()
+
+        self.last_ts = timestamp
+        self.count += 1
+        return self.count - 1
+
+    def record(self, i):
+        """Return (camera_id, timestamp, offset, length) of record i."""
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        if self.index_map is None or (i + 1) * INDEX_RECORD.size > len(self.index_map):
+            # Appended after the last mapping
+            self.index_map = _map_file(self.index_path)
+        return INDEX_RECORD.unpack_from(self.index_map, i * INDEX_RECORD.size)
+
+    def read(self, i):
+        """Return the JPEG bytes of record i as a zero-copy memoryview."""
+        _, _, offset, length = self.record(i)
+        if self.data_map is None or offset + length > len(self.data_map):
+            # Appended after the last mapping; earlier views keep the old map alive
+            self.data_map = _map_file(self.data_path)
+        return memoryview(self.data_map)[offset:offset + length]
+
+    def find(self, start, end=None, camera_id=None):
+        """Yield record numbers with start <= timestamp < end, optionally for one camera."""
+        timestamps = _TimestampView(self)
+        i = bisect.bisect_left(timestamps, start)
+        stop = self.count if end is None else bisect.bisect_left(timestamps, end, lo=i)
+
+        for n in range(i, stop):
+            if camera_id is None or self.record(n)[0] == camera_id:
+                yield n
+
+    def nearest(self, timestamp, camera_id=None):
+        """Return the record number closest in time to timestamp, or None."""
+        i = bisect.bisect_left(_TimestampView(self), timestamp)
+        best = None
+        best_delta = None
+
+        # Walk outwards from the insertion point until a match on each side
+        for rng in (range(i, self.count), range(i - 1, -1, -1)):
+            for n in rng:
+                cam, ts, _, _ = self.record(n)
+                if camera_id is None or cam == camera_id:
+                    delta = abs(ts - timestamp)
+                    if best_delta is None or delta < best_delta:
+                        best, best_delta = n, delta
+                    break
+        return best
+
+    def close(self):
+        self._unmap()
+        if self.data_file:
+            self.data_file.close()
+            self.index_file.close()
+            self.data_file = None
+            self.index_file = None
+
+    def _unmap(self):
+        for m in (self.data_map, self.index_map):
+            if m is not None:
+                try:
+                    m.close()
+                except BufferError:
+                    # read() views still use this map; it is freed with them
+                    pass
+        self.data_map = None
+        self.index_map = None
+
+
+def _map_file(path):
+    """Map a file read-only, or return None if it is missing or empty."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def append_snapshot(archive, cam_id, snapData):
+    """Append a take_snapshot() result to the archive, timestamped by createdTm."""
+    jpeg_bytes = base64.b64decode(snapData['imageData'])
+    return archive.append(cam_id, int(snapData.get('createdTm', 0)), jpeg_bytes)
+
+
+def pack_files(archive, cam_id, paths):
+    """Append local JPEG files to the archive in modification-time order."""
+    for path in sorted(paths, key=os.path.getmtime):
+        with open(path, 'rb') as f:
+            archive.append(cam_id, int(os.path.getmtime(path)), f.read())
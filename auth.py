@@ -3,35 +3,41 @@ Authentication module for Synology Surveillance Station.
 Handles login and logout operations.
 """
 
-from config import BASE_URL, AUTH_API_PATH, SYNOLOGY_USERNAME, SYNOLOGY_PASS
-import requests
+from config import AUTH_API_PATH, CAMERA_API_PATH
+from client import api_get, get_default_client
+from decoding import decode_response
+from info import query_apis
 
 
-def login():
+# API error codes for a missing, expired or invalid session
+SESSION_ERRORS = (105, 106, 119)
+
+
+def login(nas=None):
     """Login to Synology Surveillance Station and create session."""
+    nas = nas or get_default_client()
     params = {
         'api': 'SYNO.API.Auth',
         'method': 'login',
         'version': '7',
-        'account': SYNOLOGY_USERNAME,
-        'passwd': SYNOLOGY_PASS,
+        'account': nas.username,
+        'passwd': nas.password,
         'session': 'SurveillanceStation',
         'format': 'sid'
     }
     
     try:
-        response = requests.get(
-            f"{BASE_URL}{AUTH_API_PATH}",
-            params=params, 
-            timeout=10, 
-            verify=False)
+        response = api_get(AUTH_API_PATH, params, nas=nas, timeout=10)
         
         response.raise_for_status()
-        data = response.json()
+        data = decode_response(response)
         
         if data.get('success'):
             sid = data['data']['sid']
+            nas.sid = sid
             print(f"[SUCCESS] Login successful")
+            # Learn the NAS's API paths and versions once per client
+            query_apis(nas=nas)
             return sid
         else:
             error_code = data.get('error', {}).get('code')
@@ -43,7 +49,7 @@ def login():
         return None
 
 
-def logout(sid):
+def logout(sid, nas=None):
     """Logout from Synology Surveillance Station and close session."""
     if not sid:
         print("[ERROR] Invalid session ID for logout")
@@ -58,14 +64,10 @@ def logout(sid):
     }
     
     try:
-        response = requests.get(
-            f"{BASE_URL}{AUTH_API_PATH}",
-            params=params, 
-            timeout=10, 
-            verify=False)
+        response = api_get(AUTH_API_PATH, params, nas=nas, timeout=10)
         
         response.raise_for_status()
-        data = response.json()
+        data = decode_response(response)
         
         if data.get('success'):
             print("[SUCCESS] Logout successful")
@@ -78,3 +80,26 @@ def logout(sid):
     except Exception as e:
         print(f"[ERROR] Logout failed: {e}")
         return False
+
+
+def session_expired(sid, nas=None):
+    """Return True if the NAS rejects sid as a session.
+
+    Used after a failed call to tell an expired session from an ordinary
+    API error (offline camera, bad parameter) before logging in again.
+    """
+    params = {
+        'api': 'SYNO.SurveillanceStation.Info',
+        'method': 'GetInfo',
+        'version': '1',
+        '_sid': sid
+    }
+
+    try:
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=10)
+        response.raise_for_status()
+        data = decode_response(response)
+        return not data.get('success') and data.get('error', {}).get('code') in SESSION_ERRORS
+    except Exception:
+        # The NAS being unreachable is not a session problem
+        return False
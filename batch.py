@@ -0,0 +1,134 @@
+"""
+Batch module for Synology Surveillance Station.
+Sends several API calls in one SYNO.Entry.Request compound request, with a pipelined fallback.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from config import CAMERA_API_PATH
+from client import api_get, api_post, get_default_client, negotiate_version, supports
+from decoding import decode_response
+
+
+# NAS base URL -> whether SYNO.Entry.Request worked there
+_compound_supported = {}
+
+# API codes meaning the NAS does not know SYNO.Entry.Request (API, method or version missing)
+UNSUPPORTED_ERRORS = (102, 103, 104)
+
+
+class RequestBatch:
+    """Queue of API calls executed in one round trip where the NAS allows it.
+
+    Each result is a dict with 'success' and either 'data' or 'error', in
+    the order the calls were added.
+    """
+
+    def __init__(self, sid, nas=None):
+        self.sid = sid
+        self.nas = nas
+        self.calls = []
+
+    def add(self, api, method, version, **params):
+        """Queue a call; returns its position in the results."""
+        version = negotiate_version(api, version, self.nas)
+        self.calls.append(dict(params, api=api, method=method, version=version))
+        return len(self.calls) - 1
+
+    def execute(self, max_workers=8):
+        """Run the queued calls and return their results."""
+        if not self.calls:
+            return []
+
+        base_url = (self.nas or get_default_client()).base_url
+        if _compound_supported.get(base_url, True) and supports('SYNO.Entry.Request', self.nas):
+            results = self._execute_compound(base_url)
+            if results is not None:
+                return results
+
+        return self._execute_pipelined(max_workers)
+
+    def _execute_compound(self, base_url):
+        params = {
+            'api': 'SYNO.Entry.Request',
+            'method': 'request',
+            'version': '1',
+            '_sid': self.sid
+        }
+        form = {
+            'stop_when_error': 'false',
+            'mode': '"sequential"',
+            'compound': json.dumps(self.calls)
+        }
+
+        try:
+            response = api_post(CAMERA_API_PATH, params, data=form, nas=self.nas, timeout=30)
+            response.raise_for_status()
+            data = decode_response(response)
+
+            if not data.get('success'):
+                error = data.get('error', {})
+                if error.get('code') not in UNSUPPORTED_ERRORS:
+                    # e.g. an expired session: every call would fail the same way
+                    print(f"[ERROR] Compound request failed with API code: {error.get('code')}")
+                    return [{'success': False, 'error': dict(error)} for _ in self.calls]
+                print(f"[INFO] Compound request not available (API code: {error.get('code')}), "
+                      "sending calls individually")
+                _compound_supported[base_url] = False
+                return None
+
+            results = data['data'].get('result', [])
+            if len(results) != len(self.calls):
+                _compound_supported[base_url] = False
+                return None
+            return results
+
+        except Exception as e:
+            print(f"[INFO] Compound request failed ({e}), sending calls individually")
+            return None
+
+    def _execute_pipelined(self, max_workers):
+        def call(params):
+            try:
+                response = api_get(CAMERA_API_PATH, dict(params, _sid=self.sid), nas=self.nas, timeout=10)
+                response.raise_for_status()
+                return decode_response(response)
+            except Exception as e:
+                return {'success': False, 'error': {'code': None, 'message': str(e)}}
+
+        # Concurrent requests over the NAS connection pool overlap their round trips
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(self.calls))) as pool:
+            return list(pool.map(call, self.calls))
+
+
+def camera_details(sid, cam_ids, nas=None):
+    """Fetch capability, PTZ presets and live path of several cameras in one batch.
+
+    Returns {camera ID: {'capability': ..., 'presets': ..., 'live_path': ...}}
+    with None for each part that failed.
+    """
+    batch = RequestBatch(sid, nas=nas)
+    slots = {}
+    for cam_id in cam_ids:
+        slots[cam_id] = (
+            batch.add('SYNO.SurveillanceStation.Camera', 'GetCapabilityByCamId', 8, cameraId=cam_id),
+            batch.add('SYNO.SurveillanceStation.PTZ', 'ListPreset', 1, cameraId=cam_id),
+            batch.add('SYNO.SurveillanceStation.Camera', 'GetLiveViewPath', 9, idList=str(cam_id))
+        )
+
+    results = batch.execute()
+
+    def data_of(index):
+        result = results[index]
+        return result.get('data') if result.get('success') else None
+
+    details = {}
+    for cam_id, (caps, presets, live) in slots.items():
+        preset_data = data_of(presets)
+        live_data = data_of(live)
+        details[cam_id] = {
+            'capability': data_of(caps),
+            'presets': preset_data.get('presets', []) if preset_data else None,
+            'live_path': live_data[0] if isinstance(live_data, list) and live_data else None
+        }
+    return details
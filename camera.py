@@ -3,12 +3,17 @@ Camera module for Synology Surveillance Station.
 Handles camera list and live path retrieval operations.
 """
 
-import requests
-from config import BASE_URL, CAMERA_API_PATH
+from config import CAMERA_API_PATH
+from client import api_get
+from decoding import decode_response
 
 
-def get_cameras_list(sid):
-    """Get list of all connected cameras."""
+def get_cameras_list(sid, nas=None, verbose=True, id_list=None, basic=True):
+    """Get list of all connected cameras.
+    
+    id_list restricts the listing to the given camera IDs; basic=False
+    includes status fields such as 'status' and 'enabled'.
+    """
     params = {
         'api': 'SYNO.SurveillanceStation.Camera',
         'method': 'List',
@@ -16,18 +21,17 @@ def get_cameras_list(sid):
         '_sid': sid,
         'privCamType': 0,
         'camStm': 0,
-        'basic': 'true'
+        'basic': 'true' if basic else 'false'
     }
     
+    if id_list:
+        params['idList'] = ','.join(str(cam_id) for cam_id in id_list)
+    
     try:
-        response = requests.get(
-            f"{BASE_URL}{CAMERA_API_PATH}", 
-            params=params, 
-            timeout=10,
-            verify=False)
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=10)
         
         response.raise_for_status()
-        data = response.json()
+        data = decode_response(response)
         
         if not data.get('success'):
             errno = data.get('error', {}).get('code')
@@ -36,6 +40,9 @@ def get_cameras_list(sid):
         
         cameras = data['data'].get('cameras', [])
         
+        if not verbose:
+            return cameras
+
         # Display camera info
         print(f"\n[INFO] Cameras found: {len(cameras)}")
         for cam in cameras:
@@ -52,7 +59,7 @@ def get_cameras_list(sid):
         return None
     
 
-def get_capability_by_cam_id(sid, camId):
+def get_capability_by_cam_id(sid, camId, nas=None):
     params = {
         'api': 'SYNO.SurveillanceStation.Camera',
         'method': 'GetCapabilityByCamId',
@@ -62,14 +69,10 @@ def get_capability_by_cam_id(sid, camId):
     }
 
     try:
-        response = requests.get(
-            f"{BASE_URL}{CAMERA_API_PATH}", 
-            params=params,
-            timeout=10, 
-            verify=False)
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=10)
         
         response.raise_for_status()
-        data = response.json()
+        data = decode_response(response)
         
         if data.get('success'):
             return data.get('data')
@@ -84,7 +87,7 @@ def get_capability_by_cam_id(sid, camId):
         return None
 
 
-def get_live_path(sid, camId):
+def get_live_path(sid, camId, nas=None):
     """Get Live paths of the specified camera(s)"""
     params = {
         'api': "SYNO.SurveillanceStation.Camera",
@@ -95,13 +98,9 @@ def get_live_path(sid, camId):
     }
 
     try:
-        response = requests.get(
-            f"{BASE_URL}{CAMERA_API_PATH}",
-            params=params, 
-            timeout=10, 
-            verify=False)
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = decode_response(response)
 
         if not data.get('success'):
             errno = data.get('error', {}).get('code')
@@ -140,7 +139,7 @@ def get_live_path(sid, camId):
         return None
 
 
-def enable(sid, idList):
+def enable(sid, idList, nas=None):
     """Ënable the specified camera(s)"""
     params = {
         'api' : "SYNO.SurveillanceStation.Camera",
@@ -151,15 +150,10 @@ def enable(sid, idList):
     }
 
     try:
-        response = requests.get(
-            f"{BASE_URL}{CAMERA_API_PATH}",
-            params=params,
-            timeout=10,
-            verify=False
-        )
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=10)
 
         response.raise_for_status()
-        data = response.json()
+        data = decode_response(response)
 
         if data.get('success'):
             print(f"[SUCCESS] Camera {idList} enabled")
@@ -173,7 +167,7 @@ def enable(sid, idList):
         print(f"[ERROR] Enable camera failed: {e}")
 
 
-def disable(sid, idList):
+def disable(sid, idList, nas=None):
     """Disable the specified camera(s)"""
     params = {
         'api' : "SYNO.SurveillanceStation.Camera",
@@ -184,15 +178,10 @@ def disable(sid, idList):
     }
 
     try:
-        response = requests.get(
-            f"{BASE_URL}{CAMERA_API_PATH}",
-            params=params,
-            timeout=10,
-            verify=False
-        )
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=10)
 
         response.raise_for_status()
-        data = response.json()
+        data = decode_response(response)
 
         if data.get('success'):
             print(f"[SUCCESS] Camera {idList} disabled")
@@ -203,4 +192,41 @@ def disable(sid, idList):
                   f"with API code: {errno}")
 
     except Exception as e:
-        print(f"[ERROR] Disable camera failed: {e}")
\ No newline at end of file
+        print(f"[ERROR] Disable camera failed: {e}")
+
+
+def is_enabled(cam):
+    """Tell whether a camera from a non-basic List call is enabled."""
+    if 'enabled' in cam:
+        return bool(cam['enabled'])
+    return cam.get('status') != 7  # 7 = disabled
+
+
+def set_cameras_enabled(sid, changes, nas=None):
+    """Apply {camera ID: enabled} with one Enable and one Disable idList call.
+    
+    The final state is read back with a single List call. Returns a dict of
+    the cameras that did not reach the requested state (ID: actual state,
+    None if missing), or None if the verification call failed.
+    """
+    to_enable = [cam_id for cam_id, state in changes.items() if state]
+    to_disable = [cam_id for cam_id, state in changes.items() if not state]
+    
+    if to_enable:
+        enable(sid, ','.join(str(cam_id) for cam_id in to_enable), nas=nas)
+    if to_disable:
+        disable(sid, ','.join(str(cam_id) for cam_id in to_disable), nas=nas)
+    
+    cameras = get_cameras_list(sid, nas=nas, verbose=False, id_list=list(changes), basic=False)
+    if cameras is None:
+        return None
+    
+    actual = {cam.get('id'): is_enabled(cam) for cam in cameras}
+    mismatched = {cam_id: actual.get(cam_id) for cam_id, state in changes.items()
+                  if actual.get(cam_id) != bool(state)}
+    
+    if mismatched:
+        print(f"[ERROR] Cameras not in requested state: {sorted(mismatched)}")
+    else:
+        print(f"[SUCCESS] {len(changes)} camera(s) verified")
+    return mismatched
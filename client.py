@@ -0,0 +1,122 @@
+"""
+HTTP client module for Synology Surveillance Station.
+Holds per-NAS connection state and routes API calls to the right host.
+"""
+
+import time
+import requests
+from requests.adapters import HTTPAdapter
+import profiling
+from config import NAS_TARGETS
+
+
+WEBAPI_ROOT = '/webapi/'
+
+
+class NASClient:
+    """Connection state for one Synology NAS: URL, credentials, pool and session."""
+
+    def __init__(self, name, ip, port, username, password, pool_size=10):
+        self.name = name
+        self.base_url = f"http://{ip}:{port}"
+        self.username = username
+        self.password = password
+        self.sid = None
+        # API name -> {'path', 'minVersion', 'maxVersion'}, filled by info.query_apis()
+        self.apis = None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __repr__(self):
+        return f"NASClient({self.name!r}, {self.base_url!r})"
+
+    def close(self):
+        """Close the pooled connections of this client."""
+        self.session.close()
+
+
+def build_clients(targets=None, pool_size=10):
+    """Create one NASClient per configured NAS target."""
+    targets = NAS_TARGETS if targets is None else targets
+    return [
+        NASClient(t['name'], t['ip'], t['port'], t['username'], t['password'], pool_size=pool_size)
+        for t in targets
+    ]
+
+
+_default_client = None
+
+
+def get_default_client():
+    """Return the client for the first configured NAS, used when no client is given."""
+    global _default_client
+    if _default_client is None:
+        _default_client = build_clients(NAS_TARGETS[:1])[0]
+    return _default_client
+
+
+def supports(api, nas=None):
+    """False only if the NAS's API list is known and lacks api."""
+    nas = nas or get_default_client()
+    return nas.apis is None or api in nas.apis
+
+
+def negotiate_version(api, version, nas=None):
+    """Clamp a requested API version to the range the NAS reported."""
+    nas = nas or get_default_client()
+    info = nas.apis.get(api) if nas.apis else None
+    if not info:
+        return int(version)
+    return max(info.get('minVersion', 1), min(int(version), info.get('maxVersion', int(version))))
+
+
+def route(path, params, nas):
+    """Return (path, params) for the CGI path and version the NAS reported for params['api'].
+
+    Until the API list is known, or for APIs it does not name, the
+    configured path and version are used unchanged.
+    """
+    info = nas.apis.get(params.get('api')) if nas.apis and params else None
+    if not info:
+        return path, params
+
+    cgi = path.find('.cgi')
+    if cgi >= 0:
+        # Keep any suffix, e.g. the file name of a recording download
+        path = WEBAPI_ROOT + info['path'] + path[cgi + len('.cgi'):]
+    if 'version' in params:
+        version = str(negotiate_version(params['api'], params['version'], nas))
+        if version != str(params['version']):
+            params = dict(params, version=version)
+    return path, params
+
+
+def api_get(path, params, nas=None, **kwargs):
+    """Send a GET request for an API path to the given NAS (default NAS if None)."""
+    nas = nas or get_default_client()
+    path, params = route(path, params, nas)
+    name = profiling.api_name(params)
+    with profiling.span(name):
+        start = time.perf_counter()
+        response = nas.session.get(f"{nas.base_url}{path}", params=params, verify=False, **kwargs)
+        profiling.record_response(response, time.perf_counter() - start, kwargs.get('stream', False))
+    # Lets later phases (decoding) nest under the same call in the profile
+    response.api_name = name
+    return response
+
+
+def api_post(path, params, data=None, nas=None, **kwargs):
+    """Send a POST request for an API path to the given NAS (default NAS if None)."""
+    nas = nas or get_default_client()
+    path, params = route(path, params, nas)
+    name = profiling.api_name(params)
+    with profiling.span(name):
+        start = time.perf_counter()
+        response = nas.session.post(f"{nas.base_url}{path}", params=params, data=data, verify=False, **kwargs)
+        profiling.record_response(response, time.perf_counter() - start, kwargs.get('stream', False))
+    # Lets later phases (decoding) nest under the same call in the profile
+    response.api_name = name
+    return response
@@ -0,0 +1,137 @@
+"""
+Clip module for Synology Surveillance Station.
+Exports a time range of a recording without downloading the whole file.
+"""
+
+import os
+import shutil
+import subprocess
+from config import CAMERA_API_PATH
+from client import api_get
+from models import Recording
+from recording import rec_download
+
+
+def clip_window(rec, start, end, margin=2):
+    """Clamp [start - margin, end + margin] (epoch seconds) to the recording.
+
+    Returns (offset_s, duration_s) relative to the recording start, or None
+    if the range does not overlap the recording.
+    """
+    clip_start = max(start - margin, rec.start_time)
+    clip_end = min(end + margin, rec.stop_time)
+    if clip_end <= clip_start:
+        return None
+    return clip_start - rec.start_time, clip_end - clip_start
+
+
+def estimate_byte_range(rec, offset_s, duration_s, slack=0.05):
+    """Estimate the byte range of a time window assuming a constant bitrate.
+
+    slack widens the range by that fraction of the file on both sides to
+    absorb bitrate variation and the distance to the previous keyframe.
+    """
+    length = rec.stop_time - rec.start_time
+    if length <= 0 or not rec.size_byte:
+        return None
+    bytes_per_second = rec.size_byte / length
+    first = max(0, int((offset_s - length * slack) * bytes_per_second))
+    last = min(rec.size_byte - 1, int((offset_s + duration_s + length * slack) * bytes_per_second))
+    return first, last
+
+
+def fetch_byte_range(sid, rec_id, first, last, file_name, nas=None):
+    """Download bytes [first, last] of a recording with an HTTP Range request."""
+    params = {
+        'api': 'SYNO.SurveillanceStation.Recording',
+        'method': 'Download',
+        'version': '6',
+        '_sid': sid,
+        'id': rec_id
+    }
+
+    try:
+        response = api_get(f"{CAMERA_API_PATH}/{os.path.basename(file_name)}", params, nas=nas,
+                           timeout=120, stream=True, headers={'Range': f"bytes={first}-{last}"})
+        response.raise_for_status()
+
+        if response.status_code != 206:
+            print("[ERROR] Server does not support byte ranges for recordings")
+            response.close()
+            return None
+
+        with open(file_name, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+        return file_name
+
+    except Exception as e:
+        print(f"[ERROR] Recording range download failed: {e}")
+        return None
+
+
+def trim(src, dest, offset_s, duration_s):
+    """Cut [offset_s, offset_s + duration_s] out of src without re-encoding.
+
+    Stream copy cuts on keyframes, so the clip starts at the keyframe at or
+    before offset_s.
+    """
+    if not shutil.which('ffmpeg'):
+        print("[ERROR] ffmpeg not found in PATH, clip left untrimmed")
+        return None
+
+    result = subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-y', '-ss', f"{offset_s:.3f}", '-i', src,
+         '-t', f"{duration_s:.3f}", '-c', 'copy', '-avoid_negative_ts', 'make_zero', dest],
+        capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"[ERROR] Clip trim failed: {result.stderr.strip()}")
+        return None
+    return dest
+
+
+def clip_download(sid, rec, start, end, file_name, nas=None, margin=2, method='server'):
+    """Export the part of a recording between start and end (epoch seconds).
+
+    method='server' asks Surveillance Station for the window with
+    offsetTimeMs/playTimeMs. method='range' estimates a byte range from the
+    recording size instead; it only gives a playable file for containers
+    that can be decoded from the middle (e.g. MPEG-TS or fragmented MP4).
+    Either way the download is trimmed locally to the requested range.
+    """
+    if isinstance(rec, dict):
+        rec = Recording.from_api(rec)
+
+    window = clip_window(rec, start, end, margin)
+    if window is None:
+        print(f"[ERROR] Recording {rec.id} does not cover the requested range")
+        return None
+    offset_s, duration_s = window
+
+    part_name = file_name + '.part'
+    if method == 'range':
+        byte_range = estimate_byte_range(rec, offset_s, duration_s)
+        if byte_range is None:
+            print(f"[ERROR] Recording {rec.id} has no size/duration to estimate a range")
+            return None
+        if not fetch_byte_range(sid, rec.id, byte_range[0], byte_range[1], part_name, nas=nas):
+            return None
+        # Position of the requested start inside the fetched bytes, at the same bitrate
+        part_offset = max(0, offset_s - (rec.stop_time - rec.start_time) * byte_range[0] / rec.size_byte)
+    else:
+        if not rec_download(sid, rec.id, part_name, nas=nas, offset_ms=offset_s * 1000, play_ms=duration_s * 1000):
+            return None
+        part_offset = 0
+
+    # Trim away the margin, keeping the keyframe before the requested start
+    trim_offset = part_offset + (start - rec.start_time - offset_s if start > rec.start_time else 0)
+    trim_duration = min(end, rec.stop_time) - max(start, rec.start_time)
+    result = trim(part_name, file_name, max(0, trim_offset), trim_duration)
+
+    if result:
+        os.remove(part_name)
+        print(f"[SUCCESS] Clip saved: {file_name} ({trim_duration:.0f} s)")
+    else:
+        os.replace(part_name, file_name)
+        print(f"[INFO] Untrimmed clip saved: {file_name}")
+    return file_name
@@ -4,6 +4,7 @@ Loads environment variables from .env file and validates required settings.
 """
 
 import os
+import re
 from dotenv import load_dotenv
 
 
@@ -22,12 +23,45 @@ SYNOLOGY_PASS = os.getenv('SYNOLOGY_PASS', '')
 BASE_URL = f"http://{SYNOLOGY_IP}:{SYNOLOGY_PORT}"
 
 
+# Multi-NAS configuration: SYNOLOGY_HOSTS=site1,site2 with per-host
+# SYNOLOGY_<NAME>_IP / _PORT / _USERNAME / _PASS (falling back to the values above),
+# where <NAME> is the host name upper-cased with other characters than letters
+# and digits replaced by underscores
+SYNOLOGY_HOSTS = [h.strip() for h in os.getenv('SYNOLOGY_HOSTS', '').split(',') if h.strip()]
+
+
+def _host_target(name):
+    """Build the connection settings of one NAS target from the environment."""
+    # 'nas.local' -> SYNOLOGY_NAS_LOCAL_, a name a shell can export
+    prefix = f"SYNOLOGY_{re.sub(r'[^A-Za-z0-9]', '_', name).upper()}_"
+    return {
+        'name': name,
+        'ip': os.getenv(prefix + 'IP', SYNOLOGY_IP),
+        'port': int(os.getenv(prefix + 'PORT', SYNOLOGY_PORT)),
+        'username': os.getenv(prefix + 'USERNAME', SYNOLOGY_USERNAME),
+        'password': os.getenv(prefix + 'PASS', SYNOLOGY_PASS),
+    }
+
+
+if SYNOLOGY_HOSTS:
+    NAS_TARGETS = [_host_target(name) for name in SYNOLOGY_HOSTS]
+else:
+    NAS_TARGETS = [{
+        'name': SYNOLOGY_IP,
+        'ip': SYNOLOGY_IP,
+        'port': SYNOLOGY_PORT,
+        'username': SYNOLOGY_USERNAME,
+        'password': SYNOLOGY_PASS,
+    }]
+
+
 # Validation: ensure credentials are configured
-if not SYNOLOGY_USERNAME or not SYNOLOGY_PASS:
-    raise ValueError(
-        "Username and password for Synology are not configured in .env file. "
-        "Please copy .env.example to .env and fill in your credentials."
-    )
+for _target in NAS_TARGETS:
+    if not _target['username'] or not _target['password']:
+        raise ValueError(
+            f"Username and password for Synology ({_target['name']}) are not configured in .env file. "
+            "Please copy .env.example to .env and fill in your credentials."
+        )
 
 
 # API endpoint paths
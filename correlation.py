@@ -0,0 +1,114 @@
+"""
+Correlation module for Synology Surveillance Station.
+Interval index over recordings to find the recordings covering a snapshot, a time or a time range.
+"""
+
+import bisect
+from models import Recording, Snapshot
+from recording import rec_list_all
+
+
+class _CameraIntervals:
+    """Recordings of one camera sorted by start time, with a max-stop segment tree.
+
+    A query bisects the starts to find the recordings that begin before the
+    range ends, then descends only into tree nodes whose latest stop time
+    still reaches the range start: O(log n) per reported recording.
+    """
+
+    def __init__(self, recordings):
+        self.recordings = sorted(recordings, key=lambda rec: rec.start_time)
+        self.starts = [rec.start_time for rec in self.recordings]
+
+        self.size = 1
+        while self.size < len(self.recordings):
+            self.size *= 2
+        self.tree = [float('-inf')] * (2 * self.size)
+        for i, rec in enumerate(self.recordings):
+            self.tree[self.size + i] = rec.stop_time
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def overlapping(self, start, end):
+        """Recordings with start_time <= end and stop_time >= start, in start order."""
+        last = bisect.bisect_right(self.starts, end) - 1
+        found = []
+        if last >= 0:
+            self._collect(1, 0, self.size - 1, last, start, found)
+        return [self.recordings[i] for i in found]
+
+    def _collect(self, node, lo, hi, last, start, found):
+        if lo > last or self.tree[node] < start:
+            return
+        if lo == hi:
+            found.append(lo)
+            return
+        mid = (lo + hi) // 2
+        self._collect(2 * node, lo, mid, last, start, found)
+        self._collect(2 * node + 1, mid + 1, hi, last, start, found)
+
+
+class RecordingIndex:
+    """Per-camera interval index over recording start/stop times.
+
+    Lookups cost O(log n) per camera plus O(log n) per recording returned,
+    also when long recordings overlap many short ones.
+    """
+
+    def __init__(self, recordings=()):
+        by_camera = {}
+        for rec in recordings:
+            if isinstance(rec, dict):
+                rec = Recording.from_api(rec)
+            by_camera.setdefault(rec.camera_id, []).append(rec)
+        self.cameras = {cam_id: _CameraIntervals(recs) for cam_id, recs in by_camera.items()}
+
+    def __len__(self):
+        return sum(len(c.recordings) for c in self.cameras.values())
+
+    def covering(self, timestamp, camera_id=None):
+        """Recordings that cover timestamp, for one camera or all cameras."""
+        return self.overlapping(timestamp, timestamp, camera_id)
+
+    def overlapping(self, start, end, camera_id=None):
+        """Recordings that overlap [start, end], for one camera or all cameras."""
+        if camera_id is not None:
+            intervals = self.cameras.get(camera_id)
+            return intervals.overlapping(start, end) if intervals else []
+
+        found = []
+        for intervals in self.cameras.values():
+            found.extend(intervals.overlapping(start, end))
+        return found
+
+    def for_snapshot(self, snapshot):
+        """Recordings of the snapshot's camera covering its capture time."""
+        if isinstance(snapshot, dict):
+            snapshot = Snapshot.from_api(snapshot)
+        return self.covering(snapshot.created_tm, snapshot.cam_id)
+
+    def batch(self, queries):
+        """Answer many queries at once.
+
+        Each query is a timestamp, a (start, end) range, a (camera_id, start,
+        end) tuple or a snapshot (dict or Snapshot); results keep the query order.
+        """
+        results = []
+        for query in queries:
+            if isinstance(query, (dict, Snapshot)):
+                results.append(self.for_snapshot(query))
+            elif isinstance(query, tuple) and len(query) == 3:
+                results.append(self.overlapping(query[1], query[2], query[0]))
+            elif isinstance(query, tuple):
+                results.append(self.overlapping(query[0], query[1]))
+            else:
+                results.append(self.covering(query))
+        return results
+
+
+def build_index(sid, nas=None, from_time=None, to_time=None, camera_ids=None):
+    """Fetch all recordings in the time window with paged listing and index them."""
+    recordings = rec_list_all(sid, nas=nas, from_time=from_time, to_time=to_time, camera_ids=camera_ids)
+    if recordings is None:
+        return None
+    return RecordingIndex(recordings)
@@ -0,0 +1,295 @@
+"""
+Capture daemon module for Synology Surveillance Station.
+Runs per-camera snapshot schedules (fixed interval or cron-like) from one long-running process.
+
+Schedule file (JSON list), for example:
+    [
+        {"camera": 3, "dsId": 0, "interval": 60},
+        {"camera": 5, "cron": "*/5 7-19 * * 1-5", "jitter": 10, "catchup": "once"}
+    ]
+"""
+
+import argparse
+import datetime
+import heapq
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from auth import login, logout, session_expired
+from snapshot import take_snapshot, save_snapshot
+
+
+CATCHUP_POLICIES = ('skip', 'once', 'all')
+
+
+class CronSpec:
+    """Minimal cron expression: minute hour day-of-month month day-of-week.
+
+    Each field accepts '*', 'n', 'a-b', '*/s', 'a-b/s', 'n/s' (same as
+    'n-<max>/s', as in cron) and comma lists.
+    Day-of-week is 0-6 with 0 = Sunday (7 is accepted as Sunday too).
+    """
+
+    RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+
+        parsed = [self._parse(field, lo, hi) for field, (lo, hi) in zip(fields, self.RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {d % 7 for d in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse(field, lo, hi):
+        values = set()
+        for part in field.split(','):
+            step = None
+            if '/' in part:
+                part, step = part.split('/')
+                step = int(step)
+                if step < 1:
+                    raise ValueError(f"Cron step must be positive: {field!r}")
+            if part == '*':
+                start, end = lo, hi
+            elif '-' in part:
+                start, end = (int(v) for v in part.split('-'))
+            else:
+                start = int(part)
+                # With a step, a single value is where the series starts
+                end = start if step is None else hi
+            if start < lo or end > hi or start > end:
+                raise ValueError(f"Cron field out of range: {field!r}")
+            values.update(range(start, end + 1, step or 1))
+        return values
+
+    def _day_matches(self, dt):
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        # Like cron: when both day fields are restricted, either one may match
+        if not self.any_day and not self.any_weekday:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, timestamp):
+        """Return the first matching time (epoch seconds) strictly after timestamp."""
+        dt = datetime.datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0)
+        dt += datetime.timedelta(minutes=1)
+        limit = dt + datetime.timedelta(days=366 * 4)
+
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + datetime.timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += datetime.timedelta(minutes=1)
+            else:
+                return dt.timestamp()
+        raise ValueError("Cron expression never matches")
+
+
+class CaptureJob:
+    """Snapshot schedule of one camera."""
+
+    def __init__(self, camera, ds_id=0, interval=None, cron=None, jitter=0.0,
+                 catchup='skip', max_catchup=10, save=True):
+        if (interval is None) == (cron is None):
+            raise ValueError("A capture job needs exactly one of interval or cron")
+        if interval is not None and interval <= 0:
+            raise ValueError(f"Capture interval must be positive: {interval!r}")
+        if catchup not in CATCHUP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy: {catchup!r}")
+
+        self.camera = camera
+        self.ds_id = ds_id
+        self.interval = interval
+        self.cron = CronSpec(cron) if cron else None
+        self.jitter = jitter
+        self.catchup = catchup
+        self.max_catchup = max_catchup
+        self.save = save
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['camera'], d.get('dsId', 0), d.get('interval'), d.get('cron'),
+                   d.get('jitter', 0.0), d.get('catchup', 'skip'), d.get('maxCatchup', 10),
+                   d.get('save', True))
+
+    def next_slot(self, after):
+        """Next nominal capture time strictly after `after`."""
+        if self.cron:
+            return self.cron.next_after(after)
+        return after + self.interval
+
+
+class TokenBucket:
+    """Rate limiter: at most `rate` captures per second, bursts up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CaptureDaemon:
+    """Heap-based scheduler running all capture jobs from one process and session.
+
+    Every job has a nominal slot and a run time = slot + random jitter, so
+    cameras due at the same moment reach the NAS spread out. When a slot was
+    missed (the process was suspended or overloaded) the job's catch-up policy
+    decides: 'skip' drops missed slots, 'once' runs one capture for all of
+    them, 'all' runs each missed slot (at most max_catchup).
+    Captures are handed to the workers only as the rate limit allows and
+    with at most two per worker queued, so schedules asking for more than
+    `rate` captures per second fall behind instead of growing a queue.
+    """
+
+    def __init__(self, jobs, rate=5.0, workers=4, relogin_after=3, nas=None):
+        self.jobs = jobs
+        self.nas = nas
+        self.limiter = TokenBucket(rate, burst=max(1, int(rate)))
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(workers * 2)
+        self.relogin_after = relogin_after
+        self.failures = 0
+        self.sid = None
+        self.heap = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def _push(self, slot, job_index):
+        job = self.jobs[job_index]
+        run_at = slot + random.uniform(0, job.jitter)
+        heapq.heappush(self.heap, (run_at, slot, job_index))
+
+    def start_session(self):
+        self.sid = login(nas=self.nas)
+        return self.sid is not None
+
+    def _reserve(self):
+        """Wait for a rate-limit token and a free queue slot; False once stopping."""
+        self.limiter.acquire()
+        while not self.slots.acquire(timeout=1.0):
+            if self.stop_event.is_set():
+                return False
+        return True
+
+    def capture(self, job):
+        try:
+            self._capture(job)
+        finally:
+            self.slots.release()
+
+    def _capture(self, job):
+        snap_data = take_snapshot(self.sid, job.camera, job.ds_id, nas=self.nas)
+
+        with self.lock:
+            if snap_data:
+                self.failures = 0
+            else:
+                self.failures += 1
+                # Repeated failures may mean the session expired
+                if self.failures >= self.relogin_after and session_expired(self.sid, nas=self.nas):
+                    print("[INFO] NAS session expired, logging in again")
+                    self.failures = 0
+                    old_sid = self.sid
+                    if self.start_session() and old_sid:
+                        logout(old_sid, nas=self.nas)
+                return
+
+        if job.save:
+            snapshot_id = save_snapshot(self.sid, snap_data, nas=self.nas)
+            if snapshot_id:
+                print(f"[SUCCESS] Camera {job.camera}: snapshot {snapshot_id} saved")
+
+    def run(self):
+        """Run the schedules until stop() is called."""
+        now = time.time()
+        for index, job in enumerate(self.jobs):
+            # Interval jobs start right away, cron jobs at their next match
+            self._push(now if job.interval else job.next_slot(now), index)
+
+        while not self.stop_event.is_set() and self.heap:
+            run_at, slot, index = self.heap[0]
+            delay = run_at - time.time()
+            if delay > 0:
+                self.stop_event.wait(min(delay, 1.0))
+                continue
+            heapq.heappop(self.heap)
+            job = self.jobs[index]
+
+            now = time.time()
+            runs = 1
+            next_slot = job.next_slot(slot)
+            if next_slot <= now:
+                missed = 1
+                while next_slot <= now:
+                    missed += 1
+                    next_slot = job.next_slot(next_slot)
+                if job.catchup == 'all':
+                    runs = min(missed, job.max_catchup)
+                elif job.catchup == 'skip':
+                    runs = 1 if now - slot <= max(job.jitter, 1.0) else 0
+
+            for _ in range(runs):
+                if not self._reserve():
+                    return
+                self.pool.submit(self.capture, job)
+            self._push(next_slot, index)
+
+    def stop(self):
+        self.stop_event.set()
+        self.pool.shutdown(wait=True)
+
+
+def load_jobs(path):
+    with open(path) as f:
+        return [CaptureJob.from_dict(d) for d in json.load(f)]
+
+
+def main():
+    """Run the capture daemon with a schedule file."""
+    parser = argparse.ArgumentParser(description="Scheduled snapshot capture daemon.")
+    parser.add_argument('schedule', help="JSON schedule file")
+    parser.add_argument('--rate', type=float, default=5.0, help="maximum captures per second")
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    daemon = CaptureDaemon(load_jobs(args.schedule), rate=args.rate, workers=args.workers)
+    if not daemon.start_session():
+        return
+
+    print(f"[INFO] Capture daemon running {len(daemon.jobs)} schedule(s)")
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        print("\n[INFO] Capture daemon stopped")
+    finally:
+        daemon.stop()
+        logout(daemon.sid)
+
+
+if __name__ == "__main__":
+    main()
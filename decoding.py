@@ -0,0 +1,91 @@
+"""
+JSON decoding module for Synology Surveillance Station.
+Uses the fastest installed JSON backend and extracts snapshot image data without building a str.
+"""
+
+import json
+from profiling import span, call_span
+
+try:
+    import orjson
+    JSON_BACKEND = 'orjson'
+    _loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        JSON_BACKEND = 'ujson'
+        _loads = ujson.loads
+    except ImportError:
+        JSON_BACKEND = 'json'
+        _loads = json.loads
+
+
+IMAGE_DATA_KEY = b'"imageData"'
+JSON_WHITESPACE = b' \t\r\n'
+
+
+def loads(raw):
+    """Parse JSON bytes or str with the selected backend."""
+    return _loads(raw)
+
+
+def decode_response(response):
+    """Parse the JSON body of an API response."""
+    content = response.content
+    with call_span(response), span('decode'):
+        return _loads(content)
+
+
+def split_image_data(raw):
+    """Cut the "imageData" string value out of a raw JSON body.
+
+    Returns (json_without_image, image_data) where image_data is a
+    memoryview over the base64 bytes (or None if the field is absent) and
+    json_without_image is the body with an empty "imageData" value.
+    Anything but a plain string as the first "imageData" value (null, or the
+    text appearing elsewhere first) returns (raw, None) for a full parse.
+    """
+    key = raw.find(IMAGE_DATA_KEY)
+    if key < 0:
+        return raw, None
+
+    pos = _skip_whitespace(raw, key + len(IMAGE_DATA_KEY))
+    if raw[pos:pos + 1] != b':':
+        return raw, None
+    pos = _skip_whitespace(raw, pos + 1)
+    if raw[pos:pos + 1] != b'"':
+        return raw, None
+
+    start = pos + 1
+    end = raw.find(b'"', start)
+    if end < 0 or raw[end - 1:end] == b'\\':
+        return raw, None
+
+    image_data = memoryview(raw)[start:end]
+    # JSON encoders may escape '/' as '\/'; base64 contains no other escapes
+    if raw.find(b'\\', start, end) >= 0:
+        image_data = memoryview(image_data.tobytes().replace(b'\\/', b'/'))
+
+    return raw[:start] + raw[end:], image_data
+
+
+def _skip_whitespace(raw, pos):
+    while raw[pos:pos + 1] and raw[pos:pos + 1] in JSON_WHITESPACE:
+        pos += 1
+    return pos
+
+
+def decode_snapshot_response(response):
+    """Parse a TakeSnapshot response, keeping data.imageData as raw base64 bytes."""
+    content = response.content
+    with call_span(response), span('decode'):
+        stripped, image_data = split_image_data(content)
+        data = _loads(stripped)
+
+    if isinstance(data.get('data'), dict):
+        if image_data is None and isinstance(data['data'].get('imageData'), str):
+            # Parsed in full; callers still get the base64 as bytes
+            image_data = memoryview(data['data']['imageData'].encode('ascii'))
+        if image_data is not None:
+            data['data']['imageData'] = image_data
+    return data
@@ -0,0 +1,218 @@
+"""
+Near-duplicate module for Synology Surveillance Station.
+Perceptual hashes of saved snapshots, an index for Hamming-distance search and duplicate cleanup.
+"""
+
+import argparse
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from auth import login, logout
+from client import get_default_client
+from models import Snapshot
+from snapshot import get_snapshot_list, fetch_snapshot, delete_snapshots
+from store import ContentStore
+
+
+HASH_SIZE = 8
+
+
+def dhash(image_bytes, size=HASH_SIZE):
+    """Difference hash of an image as an int of size * size bits.
+
+    The image is reduced to (size + 1) x size grey pixels; each bit tells
+    whether a pixel is brighter than its right neighbour. JPEG draft mode
+    lets the decoder downscale by up to 8x while decoding.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image.draft('L', ((size + 1) * 8, size * 8))
+        pixels = image.convert('L').resize((size + 1, size), Image.BILINEAR).tobytes()
+
+    value = 0
+    for row in range(0, len(pixels), size + 1):
+        for col in range(row, row + size):
+            value = (value << 1) | (pixels[col] > pixels[col + 1])
+    return value
+
+
+def hamming(a, b):
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+
+class HashIndex:
+    """Hashes searchable by Hamming distance without comparing against every entry.
+
+    A hash is split into max_distance + 1 bands. Two hashes within
+    max_distance bits must agree exactly on at least one band, so only
+    entries sharing a band are compared.
+    """
+
+    def __init__(self, max_distance=4, bits=HASH_SIZE * HASH_SIZE):
+        self.max_distance = max_distance
+        bands = min(max_distance + 1, bits)
+        edges = [bits * i // bands for i in range(bands + 1)]
+        self.bands = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+        self.tables = [{} for _ in self.bands]
+        self.hashes = {}
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def add(self, key, value):
+        self.hashes[key] = value
+        for (shift, mask), table in zip(self.bands, self.tables):
+            table.setdefault((value >> shift) & mask, []).append(key)
+
+    def search(self, value):
+        """Return [(key, distance)] of entries within max_distance, nearest first."""
+        found = {}
+        for (shift, mask), table in zip(self.bands, self.tables):
+            for key in table.get((value >> shift) & mask, ()):
+                if key not in found:
+                    found[key] = hamming(value, self.hashes[key])
+        return sorted(((k, d) for k, d in found.items() if d <= self.max_distance), key=lambda kd: kd[1])
+
+
+class HashCache:
+    """(NAS name, snapshot ID) -> hash kept in a JSON-lines file, so images are hashed only once.
+
+    Snapshot IDs are only unique per NAS. Entries written without a NAS name
+    match no NAS, so those snapshots are hashed again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hashes = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.hashes[(entry.get('nas'), entry['id'])] = int(entry['hash'], 16)
+
+    def get(self, nas_id, snap_id):
+        return self.hashes.get((nas_id, snap_id))
+
+    def put(self, nas_id, snap_id, value):
+        self.hashes[(nas_id, snap_id)] = value
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'nas': nas_id, 'id': snap_id, 'hash': f"{value:016x}"}) + '\n')
+
+
+def hash_snapshots(sid, snapshots, nas=None, cache=None, workers=4, store=None):
+    """Return {snapshot ID: dhash}, fetching only snapshots missing from the cache.
+
+    With a ContentStore, snapshots already stored are hashed from disk and
+    fetched ones are added to it, so store.sync_snapshots() exports them
+    without downloading them again.
+    """
+    nas_id = (nas or get_default_client()).name
+    hashes = {}
+    missing = []
+    for snap in snapshots:
+        value = cache.get(nas_id, snap.id) if cache else None
+        if value is None:
+            missing.append(snap)
+        else:
+            hashes[snap.id] = value
+
+    def load(snap):
+        digest = store.lookup(nas_id, 'snapshot', snap.id, snap.byte_size, snap.created_tm) if store else None
+        if digest:
+            with open(store.object_path(digest), 'rb') as f:
+                return f.read()
+        content = fetch_snapshot(sid, snap.id, nas=nas)
+        if content is not None and store:
+            store.add_bytes(content, None, nas_id, 'snapshot', snap.id, snap.byte_size, snap.created_tm)
+        return content
+
+    def compute(snap):
+        try:
+            content = load(snap)
+            if content is None:
+                return snap.id, None
+            return snap.id, dhash(content)
+        except Exception as e:
+            print(f"[ERROR] Snapshot {snap.id} could not be hashed: {e}")
+            return snap.id, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for snap_id, value in pool.map(compute, missing):
+            if value is not None:
+                hashes[snap_id] = value
+                if cache:
+                    cache.put(nas_id, snap_id, value)
+    return hashes
+
+
+def find_duplicates(snapshots, hashes, max_distance=4):
+    """Mark snapshots that look like an earlier kept snapshot of the same camera.
+
+    Snapshots are visited oldest first; each one is kept unless it is within
+    max_distance bits of a kept one. Returns {duplicate ID: kept ID}.
+    """
+    indexes = {}
+    duplicates = {}
+    for snap in sorted(snapshots, key=lambda s: s.created_tm):
+        value = hashes.get(snap.id)
+        if value is None:
+            continue
+        index = indexes.setdefault(snap.cam_id, HashIndex(max_distance))
+        matches = index.search(value)
+        if matches:
+            duplicates[snap.id] = matches[0][0]
+        else:
+            index.add(snap.id, value)
+    return duplicates
+
+
+def delete_duplicates(sid, duplicate_ids, nas=None, batch_size=100):
+    """Delete snapshots in batches; returns the number deleted."""
+    duplicate_ids = list(duplicate_ids)
+    deleted = 0
+    for i in range(0, len(duplicate_ids), batch_size):
+        batch = duplicate_ids[i:i + batch_size]
+        if delete_snapshots(sid, batch, nas=nas):
+            deleted += len(batch)
+    return deleted
+
+
+def main():
+    """Find (and optionally delete) near-duplicate snapshots of a camera."""
+    parser = argparse.ArgumentParser(description="Find near-duplicate snapshots.")
+    parser.add_argument('camera', type=int, help="camera ID")
+    parser.add_argument('--distance', type=int, default=4, help="maximum differing hash bits")
+    parser.add_argument('--cache', default='snapshot_hashes.jsonl', help="hash cache file")
+    parser.add_argument('--delete', action='store_true', help="delete the duplicates on the NAS")
+    parser.add_argument('--store', help="content store directory to keep the fetched images in for export")
+    args = parser.parse_args()
+
+    sid = login()
+    if not sid:
+        return
+
+    try:
+        snap_list = get_snapshot_list(sid, args.camera)
+        if not snap_list:
+            return
+        snapshots = [Snapshot.from_api(s) for s in snap_list]
+
+        store = ContentStore(args.store) if args.store else None
+        hashes = hash_snapshots(sid, snapshots, cache=HashCache(args.cache), store=store)
+        duplicates = find_duplicates(snapshots, hashes, args.distance)
+        saved = sum(s.byte_size for s in snapshots if s.id in duplicates)
+        print(f"[INFO] {len(duplicates)} of {len(snapshots)} snapshots are near-duplicates "
+              f"({saved / (1024 * 1024):.1f} MB)")
+
+        if args.delete and duplicates:
+            deleted = delete_duplicates(sid, duplicates)
+            print(f"[SUCCESS] Deleted {deleted} near-duplicate snapshot(s)")
+    finally:
+        logout(sid)
+
+
+if __name__ == "__main__":
+    main()
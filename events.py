@@ -0,0 +1,235 @@
+"""
+Event intake module for Synology Surveillance Station.
+Receives action-rule webhooks over HTTP and dispatches them to handlers through a bounded queue.
+
+Configure the action rule's webhook URL as, for example:
+    http://<host>:8088/event/motion?camId=3&dsId=0&token=<token>
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+from auth import login, logout
+from snapshot import take_snapshot, save_snapshot
+from recording import rec_download
+
+
+# Webhook bodies are small; larger ones are refused with 413
+MAX_BODY_SIZE = 64 * 1024
+
+
+class EventDispatcher:
+    """Bounded event queue drained by worker threads that call registered handlers."""
+
+    def __init__(self, queue_size=1000, workers=4):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handlers = {}
+        self.workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+
+    def on(self, event_type, handler):
+        """Register handler(event) for an event type; '*' receives every event."""
+        self.handlers.setdefault(event_type, []).append(handler)
+
+    def submit(self, event):
+        """Queue an event; returns False when the queue is full."""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+
+    def _work(self):
+        while True:
+            event = self.queue.get()
+            if event is None:
+                break
+
+            try:
+                handlers = self.handlers.get(event['type'], []) + self.handlers.get('*', [])
+            except Exception as e:
+                # A bad event must never stop the worker
+                print(f"[ERROR] Cannot dispatch event: {e}")
+                continue
+
+            for handler in handlers:
+                try:
+                    handler(event)
+                except Exception as e:
+                    print(f"[ERROR] Event handler failed for {event['type']}: {e}")
+
+
+def parse_event(path, body=b''):
+    """Build an event dict from a webhook path, query string and optional body.
+
+    Raises ValueError for a JSON body that is not an object or whose event is not a string.
+    """
+    url = urlparse(path)
+    fields = dict(parse_qsl(url.query))
+
+    if body:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = dict(parse_qsl(body.decode(errors='replace')))
+        if not isinstance(payload, dict):
+            raise ValueError("event body must be a JSON object")
+        fields.update(payload)
+
+    parts = [p for p in url.path.split('/') if p]
+    event_type = fields.pop('event', None) or (parts[-1] if parts else 'unknown')
+    if not isinstance(event_type, str):
+        raise ValueError("event must be a string")
+
+    return {
+        'type': event_type,
+        'camId': fields.get('camId', fields.get('cameraId')),
+        'dsId': fields.get('dsId', 0),
+        'received': time.time(),
+        'fields': fields
+    }
+
+
+class EventServer(ThreadingHTTPServer):
+    """HTTP server that turns webhook calls into queued events."""
+
+    daemon_threads = True
+
+    def __init__(self, address, dispatcher, token=None):
+        super().__init__(address, _EventRequestHandler)
+        self.dispatcher = dispatcher
+        self.token = token
+
+
+class _EventRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self._handle(b'')
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._reply(400, {'success': False, 'error': 'invalid Content-Length'})
+            return
+        if length > MAX_BODY_SIZE:
+            self.close_connection = True
+            self._reply(413, {'success': False, 'error': 'event body too large'})
+            return
+        self._handle(self.rfile.read(length) if length else b'')
+
+    def _handle(self, body):
+        try:
+            event = parse_event(self.path, body)
+        except ValueError as e:
+            self._reply(400, {'success': False, 'error': str(e)})
+            return
+
+        if self.server.token and event['fields'].pop('token', None) != self.server.token:
+            self._reply(403, {'success': False, 'error': 'invalid token'})
+            return
+
+        if not self.server.dispatcher.submit(event):
+            self._reply(503, {'success': False, 'error': 'event queue full'})
+            return
+
+        self._reply(202, {'success': True})
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def snapshot_handler(sid, nas=None, save=True):
+    """Handler that captures (and saves) a snapshot of the event's camera."""
+    def handle(event):
+        if event['camId'] is None:
+            return
+        snap_data = take_snapshot(sid, event['camId'], event['dsId'], nas=nas)
+        if snap_data and save:
+            snapshot_id = save_snapshot(sid, snap_data, nas=nas)
+            if snapshot_id:
+                print(f"[SUCCESS] {event['type']} on camera {event['camId']}: snapshot {snapshot_id} saved")
+    return handle
+
+
+def recording_export_handler(sid, dest_dir, nas=None, store=None):
+    """Handler that downloads the recording named by the event's 'recId' field."""
+    def handle(event):
+        rec_id = event['fields'].get('recId') or event['fields'].get('id')
+        if not rec_id:
+            return
+        os.makedirs(dest_dir, exist_ok=True)
+        rec_download(sid, rec_id, os.path.join(dest_dir, f"{rec_id}.mp4"), nas=nas, store=store)
+    return handle
+
+
+def print_event(event):
+    """Handler that prints one line per received event."""
+    print(f"[INFO] Event {event['type']} from camera {event['camId']}")
+
+
+def main():
+    """Run the event intake server with snapshot-on-event handlers."""
+    parser = argparse.ArgumentParser(description="Receive Surveillance Station webhooks.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on; other than loopback requires --token")
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--token', default=os.getenv('EVENT_TOKEN'), help="shared secret expected as ?token=")
+    parser.add_argument('--snapshot-on', nargs='*', default=['motion'], help="event types that trigger a snapshot")
+    parser.add_argument('--export-dir', help="download recordings named by 'recording' events here")
+    args = parser.parse_args()
+
+    if not args.token and args.host not in ('127.0.0.1', 'localhost', '::1'):
+        # Anyone who can reach the port could otherwise trigger snapshots
+        print(f"[ERROR] Listening on {args.host} requires --token or EVENT_TOKEN")
+        return
+
+    sid = login()
+    if not sid:
+        return
+
+    dispatcher = EventDispatcher()
+    dispatcher.on('*', print_event)
+    for event_type in args.snapshot_on:
+        dispatcher.on(event_type, snapshot_handler(sid))
+    if args.export_dir:
+        dispatcher.on('recording', recording_export_handler(sid, args.export_dir))
+    dispatcher.start()
+
+    server = EventServer((args.host, args.port), dispatcher, token=args.token)
+    print(f"[INFO] Listening for events on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[INFO] Stopping event server")
+    finally:
+        server.server_close()
+        dispatcher.stop()
+        logout(sid)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Federation module for Synology Surveillance Station.
+Runs operations across many NAS hosts in parallel and merges the results by host.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from auth import login, logout
+from client import build_clients
+from camera import get_cameras_list, set_cameras_enabled
+from snapshot import take_snapshot
+
+
+def fan_out(clients, func, *args, max_workers=None, **kwargs):
+    """Call func(client, *args, **kwargs) on every client in parallel.
+
+    Returns a dict {host name: result}; a host whose call raised maps to None.
+    """
+    if not clients:
+        return {}
+
+    def run(client):
+        try:
+            return func(client, *args, **kwargs)
+        except Exception as e:
+            print(f"[ERROR] {client.name}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(clients)) as pool:
+        results = pool.map(run, clients)
+        return {client.name: result for client, result in zip(clients, results)}
+
+
+def login_all(clients):
+    """Login to every NAS; returns the clients that have a valid session."""
+    fan_out(clients, lambda c: login(nas=c))
+    return [c for c in clients if c.sid]
+
+
+def logout_all(clients):
+    """Logout from every NAS that holds a session and close its pool."""
+    def close(client):
+        if client.sid:
+            logout(client.sid, nas=client)
+            client.sid = None
+        client.close()
+
+    fan_out(clients, close)
+
+
+def list_all_cameras(clients):
+    """List cameras of every NAS, merged into one list tagged with 'host'."""
+    results = fan_out(clients, lambda c: get_cameras_list(c.sid, nas=c, verbose=False))
+
+    cameras = []
+    for client in clients:
+        for cam in results.get(client.name) or []:
+            cam['host'] = client.name
+            cameras.append(cam)
+    return cameras
+
+
+def snapshot_all(clients, cameras=None, max_workers=16):
+    """Take a snapshot of every camera on every NAS in parallel.
+
+    Returns a list of snapshot dicts tagged with 'host' and 'camId';
+    cameras whose capture failed are left out.
+    """
+    if cameras is None:
+        cameras = list_all_cameras(clients)
+    by_name = {c.name: c for c in clients}
+
+    def capture(cam):
+        client = by_name[cam['host']]
+        snap = take_snapshot(client.sid, cam.get('id'), cam.get('dsId'), nas=client)
+        if snap:
+            snap['host'] = client.name
+            snap['camId'] = cam.get('id')
+        return snap
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return [snap for snap in pool.map(capture, cameras) if snap]
+
+
+def set_enabled_all(clients, changes_by_host):
+    """Apply {host name: {camera ID: enabled}} on all hosts concurrently.
+
+    Returns {host name: mismatched cameras} as returned by set_cameras_enabled.
+    """
+    targets = [c for c in clients if changes_by_host.get(c.name)]
+    return fan_out(targets, lambda c: set_cameras_enabled(c.sid, changes_by_host[c.name], nas=c))
+
+
+def print_cameras_by_host(cameras):
+    """Print a merged camera listing, one line per camera with its host."""
+    print(f"\n[INFO] Cameras found: {len(cameras)}")
+    for cam in cameras:
+        print(f"Host: {cam.get('host', ''):15} | "
+              f"Camera: {cam.get('model'):20} | "
+              f"ID: {cam.get('id'):3} | "
+              f"dsId: {cam.get('dsId')}")
+
+
+def main():
+    """List cameras across all configured NAS hosts."""
+    clients = build_clients()
+    try:
+        active = login_all(clients)
+        print_cameras_by_host(list_all_cameras(active))
+    finally:
+        logout_all(clients)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Gateway module for Synology Surveillance Station.
+Local HTTP/JSON API shared by several tools, with one NAS session, request coalescing and a snapshot cache.
+
+Endpoints:
+    GET /cameras                       camera list
+    GET /snapshot/<camId>?dsId=0       current JPEG (add format=json for the API payload)
+    GET /snapshots/<camId>             saved snapshots of a camera
+    GET /stats                         NAS calls, coalesced requests and cache hits
+"""
+
+import argparse
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+from auth import login, logout, session_expired
+from camera import get_cameras_list
+from snapshot import take_snapshot, get_snapshot_list
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key share its result."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.coalesced = 0
+
+    def do(self, key, func):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = {'done': threading.Event(), 'result': None}
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call['done'].wait()
+            return call['result']
+
+        try:
+            call['result'] = func()
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call['done'].set()
+        return call['result']
+
+
+class TTLCache:
+    """Thread-safe dict whose entries expire ttl seconds after they were stored."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.hits = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+
+
+class Gateway:
+    """NAS access shared by all gateway clients.
+
+    Identical requests arriving while one is in flight wait for it instead of
+    reaching the NAS, and results stay cached for a short TTL, so many
+    dashboards polling the same camera cost one TakeSnapshot per TTL.
+    """
+
+    def __init__(self, nas=None, snapshot_ttl=2.0, list_ttl=5.0):
+        self.nas = nas
+        self.sid = None
+        self.login_lock = threading.Lock()
+        self.flight = SingleFlight()
+        self.snapshots = TTLCache(snapshot_ttl)
+        self.lists = TTLCache(list_ttl)
+        self.nas_calls = 0
+        self.stats_lock = threading.Lock()
+
+    def start_session(self):
+        self.sid = login(nas=self.nas)
+        return self.sid is not None
+
+    def _count_call(self):
+        with self.stats_lock:
+            self.nas_calls += 1
+
+    def _call(self, func, *args):
+        """Call func(sid, *args), logging in again once if it failed because the session expired."""
+        sid = self.sid
+        self._count_call()
+        result = func(sid, *args, nas=self.nas)
+        if result is not None:
+            return result
+
+        self._count_call()
+        if not session_expired(sid, nas=self.nas):
+            return None
+
+        with self.login_lock:
+            # Another request may already have renewed the session
+            if self.sid == sid:
+                print("[INFO] NAS session expired, logging in again")
+                logout(sid, nas=self.nas)
+                self.start_session()
+        if self.sid is None:
+            return None
+        self._count_call()
+        return func(self.sid, *args, nas=self.nas)
+
+    def _cached(self, cache, key, fetch):
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        def load():
+            value = fetch()
+            if value is not None:
+                cache.put(key, value)
+            return value
+
+        return self.flight.do(key, load)
+
+    def cameras(self):
+        return self._cached(self.lists, ('cameras',), lambda: self._call(
+            lambda sid, nas: get_cameras_list(sid, nas=nas, verbose=False)))
+
+    def snapshot_list(self, cam_id):
+        return self._cached(self.lists, ('snapshots', cam_id),
+                            lambda: self._call(get_snapshot_list, cam_id))
+
+    def snapshot(self, cam_id, ds_id=0):
+        """Return (jpeg_bytes, json_body) of a recent snapshot, or None."""
+        def fetch():
+            snap_data = self._call(take_snapshot, cam_id, ds_id)
+            if not snap_data:
+                return None
+            # Encode once here rather than once per client
+            image_data = bytes(snap_data.get('imageData') or b'')
+            payload = dict(snap_data, imageData=image_data.decode('ascii'))
+            body = json.dumps({'success': True, 'data': payload}).encode()
+            return base64.b64decode(image_data), body
+
+        return self._cached(self.snapshots, ('snapshot', cam_id, ds_id), fetch)
+
+    def stats(self):
+        with self.stats_lock:
+            nas_calls = self.nas_calls
+        return {
+            'nasCalls': nas_calls,
+            'coalesced': self.flight.coalesced,
+            'snapshotCacheHits': self.snapshots.hits,
+            'listCacheHits': self.lists.hits
+        }
+
+
+class GatewayServer(ThreadingHTTPServer):
+    """HTTP server exposing a Gateway to local clients."""
+
+    daemon_threads = True
+
+    def __init__(self, address, gateway):
+        super().__init__(address, _GatewayRequestHandler)
+        self.gateway = gateway
+
+
+class _GatewayRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = dict(parse_qsl(url.query))
+        parts = [p for p in url.path.split('/') if p]
+        gateway = self.server.gateway
+
+        try:
+            if parts == ['cameras']:
+                self._reply_data(gateway.cameras(), 'cameras')
+            elif len(parts) == 2 and parts[0] == 'snapshot':
+                snap = gateway.snapshot(int(parts[1]), int(query.get('dsId', 0)))
+                if snap is None:
+                    self._reply_json(502, {'success': False, 'error': 'snapshot failed'})
+                elif query.get('format') == 'json':
+                    self._reply(200, 'application/json', snap[1])
+                else:
+                    self._reply(200, 'image/jpeg', snap[0])
+            elif len(parts) == 2 and parts[0] == 'snapshots':
+                self._reply_data(gateway.snapshot_list(int(parts[1])), 'snapshots')
+            elif parts == ['stats']:
+                self._reply_json(200, {'success': True, 'data': gateway.stats()})
+            else:
+                self._reply_json(404, {'success': False, 'error': 'unknown endpoint'})
+        except ValueError:
+            self._reply_json(400, {'success': False, 'error': 'invalid camera or dsId'})
+
+    def _reply_data(self, value, key):
+        if value is None:
+            self._reply_json(502, {'success': False, 'error': 'NAS request failed'})
+        else:
+            self._reply_json(200, {'success': True, 'data': {key: value}})
+
+    def _reply_json(self, code, payload):
+        self._reply(code, 'application/json', json.dumps(payload).encode())
+
+    def _reply(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    """Run the local gateway."""
+    parser = argparse.ArgumentParser(description="Local caching gateway to Surveillance Station.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--snapshot-ttl', type=float, default=2.0, help="seconds a snapshot is reused")
+    parser.add_argument('--list-ttl', type=float, default=5.0, help="seconds camera/snapshot lists are reused")
+    args = parser.parse_args()
+
+    gateway = Gateway(snapshot_ttl=args.snapshot_ttl, list_ttl=args.list_ttl)
+    if not gateway.start_session():
+        return
+
+    server = GatewayServer((args.host, args.port), gateway)
+    print(f"[INFO] Gateway listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[INFO] Stopping gateway")
+    finally:
+        server.server_close()
+        logout(gateway.sid)
+
+
+if __name__ == "__main__":
+    main()
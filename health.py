@@ -0,0 +1,167 @@
+"""
+Health monitor module for Synology Surveillance Station.
+Polls camera status with one batched List call per interval and reports only changes.
+"""
+
+import threading
+import time
+from camera import get_cameras_list
+
+
+# Camera 'status' values returned by SYNO.SurveillanceStation.Camera List
+CAMERA_STATUS = {
+    1: 'normal',
+    2: 'deleted',
+    3: 'disconnected',
+    4: 'unavailable',
+    5: 'ready',
+    6: 'inaccessible',
+    7: 'disabled',
+    8: 'unrecognized',
+    9: 'setting',
+    10: 'server disconnected',
+    11: 'migrating',
+    12: 'others',
+    13: 'storage removed',
+    14: 'stopping',
+    15: 'connect hist failed',
+    16: 'unauthorized',
+    17: 'RTSP error',
+    18: 'no video'
+}
+
+# Fields compared between polls to detect a change
+WATCHED_FIELDS = ('status', 'enabled')
+
+
+def print_change(cam_id, old, new):
+    """Default change handler: print one line per camera state change."""
+    if new is None:
+        print(f"[INFO] Camera {cam_id} removed")
+        return
+
+    status = CAMERA_STATUS.get(new.get('status'), new.get('status'))
+    if old is None:
+        print(f"[INFO] Camera {cam_id} found: {status}, enabled={new.get('enabled')}")
+    else:
+        print(f"[INFO] Camera {cam_id} changed: {status}, enabled={new.get('enabled')}")
+
+
+class HealthMonitor:
+    """Background poller of camera status with per-camera adaptive intervals.
+
+    Each camera starts at its base interval. The interval doubles, up to
+    max_interval, after every poll in which the camera did not change, and it
+    goes back to the base interval as soon as the camera changes. All
+    cameras due at the same time are queried in one List call, and every
+    max_interval a full listing picks up cameras that were added. While the
+    List call fails, the cameras it asked for (or the full listing) are
+    retried after a delay that doubles per consecutive failure.
+    """
+
+    def __init__(self, sid, nas=None, base_interval=10, max_interval=300, on_change=print_change):
+        self.sid = sid
+        self.nas = nas
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.on_change = on_change
+
+        self.state = {}
+        self.base_intervals = {}
+        self.intervals = {}
+        self.next_due = {}
+        self.next_full = 0
+        self.failures = 0
+
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def set_interval(self, cam_id, seconds):
+        """Set the base poll interval of one camera."""
+        with self.lock:
+            self.base_intervals[cam_id] = seconds
+            self.intervals[cam_id] = seconds
+            self.next_due[cam_id] = min(self.next_due.get(cam_id, 0), time.monotonic() + seconds)
+
+    def poll(self):
+        """Poll the cameras that are due and emit their changes; returns the changes."""
+        now = time.monotonic()
+        with self.lock:
+            if now >= self.next_full:
+                due = None
+                self.next_full = now + self.max_interval
+            else:
+                due = [cam_id for cam_id, t in self.next_due.items() if t <= now]
+                if not due:
+                    return []
+
+        cameras = get_cameras_list(self.sid, nas=self.nas, verbose=False, id_list=due, basic=False)
+        if cameras is None:
+            self._retry_later(due, now)
+            return []
+
+        changes = []
+        with self.lock:
+            self.failures = 0
+            seen = set()
+            for cam in cameras:
+                cam_id = cam.get('id')
+                seen.add(cam_id)
+                new = {field: cam.get(field) for field in WATCHED_FIELDS}
+                old = self.state.get(cam_id)
+
+                base = self.base_intervals.get(cam_id, self.base_interval)
+                if old != new:
+                    changes.append((cam_id, old, new))
+                    self.state[cam_id] = new
+                    self.intervals[cam_id] = base
+                else:
+                    self.intervals[cam_id] = min(self.intervals.get(cam_id, base) * 2, self.max_interval)
+                self.next_due[cam_id] = now + self.intervals[cam_id]
+
+            # Cameras asked for but missing from the answer were removed
+            for cam_id in (due if due is not None else list(self.state)):
+                if cam_id not in seen and cam_id in self.state:
+                    changes.append((cam_id, self.state.pop(cam_id), None))
+                    self.next_due.pop(cam_id, None)
+                    self.intervals.pop(cam_id, None)
+
+        for cam_id, old, new in changes:
+            try:
+                self.on_change(cam_id, old, new)
+            except Exception as e:
+                print(f"[ERROR] Health change handler failed: {e}")
+        return changes
+
+    def _retry_later(self, due, now):
+        """Back off after a failed List call instead of retrying at once."""
+        with self.lock:
+            self.failures += 1
+            delay = min(self.base_interval * 2 ** (self.failures - 1), self.max_interval)
+            if due is None:
+                self.next_full = now + delay
+            else:
+                for cam_id in due:
+                    interval = self.intervals.get(cam_id, self.base_interval)
+                    self.next_due[cam_id] = now + min(max(interval, delay), self.max_interval)
+
+    def run(self):
+        """Poll until stop() is called."""
+        while not self.stop_event.is_set():
+            self.poll()
+            with self.lock:
+                wake = min(self.next_due.values(), default=self.next_full)
+                wake = min(wake, self.next_full)
+            self.stop_event.wait(max(wake - time.monotonic(), 0.1))
+
+    def start(self):
+        """Start polling in a background thread."""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
@@ -1,39 +1,65 @@
 """
 Info module for Synology Surveillance Station.
-Handles API information retrieval operations.
+Handles API information retrieval and caches each NAS's API paths and versions.
 """
 
-import requests
 import json
-from config import BASE_URL, INFO_API_PATH
+from config import INFO_API_PATH
+from client import api_get, get_default_client
+from decoding import decode_response
 
 
-def get_info(sid):
-    """Display information about available Surveillance Station APIs."""
+SURVEILLANCE_APIS = (
+    'SYNO.SurveillanceStation.Info',
+    'SYNO.SurveillanceStation.PTZ',
+    'SYNO.SurveillanceStation.Camera',
+    'SYNO.SurveillanceStation.SnapShot',
+    'SYNO.SurveillanceStation.Recording',
+    'SYNO.SurveillanceStation.Auth'
+)
+
+
+def query_apis(nas=None, refresh=False):
+    """Return {API name: {'path', 'minVersion', 'maxVersion'}} of a NAS.
+
+    SYNO.API.Info is queried once per NAS; the result is kept on the client
+    and used by client.api_get/api_post to pick each API's CGI path and
+    version.
+    """
+    nas = nas or get_default_client()
+    if nas.apis is not None and not refresh:
+        return nas.apis
+
     params = {
         'api': 'SYNO.API.Info',
         'method': 'Query',
         'version': '1',
-        'query': 'SYNO.SurveillanceStation.Info, '
-                 'SYNO.SurveillanceStation.PTZ, '
-                 'SYNO.SurveillanceStation.Camera, '
-                 'SYNO.SurveillanceStation.SnapShot, '
-                 'SYNO.SurveillanceStation.Recording, '
-                 'SYNO.SurveillanceStation.Auth',
-        '_sid': sid
+        'query': 'ALL'
     }
-    
+
     try:
-        response = requests.get(f"{BASE_URL}{INFO_API_PATH}", params=params, timeout=10, verify=False)
+        response = api_get(INFO_API_PATH, params, nas=nas, timeout=10)
         response.raise_for_status()
-        data = response.json()
-        
+        data = decode_response(response)
+
         if data.get('success'):
-            print("\n[INFO] Available APIs:")
-            print(json.dumps(data['data'], indent=4))
+            nas.apis = data['data']
+            return nas.apis
         else:
             errno = data.get('error', {}).get('code')
             print(f"[ERROR] API info query failed with API code: {errno}")
-            
+            return None
+
     except Exception as e:
         print(f"[ERROR] API info retrieval failed: {e}")
+        return None
+
+
+def get_info(sid, nas=None):
+    """Display information about available Surveillance Station APIs."""
+    apis = query_apis(nas=nas, refresh=True)
+    if apis is None:
+        return
+
+    print("\n[INFO] Available APIs:")
+    print(json.dumps({name: apis[name] for name in SURVEILLANCE_APIS if name in apis}, indent=4))
@@ -0,0 +1,203 @@
+"""
+Ingest module for Synology Surveillance Station.
+Uploads a directory of local JPEGs as saved snapshots, with streamed bodies and a resumable journal.
+"""
+
+import argparse
+import base64
+import datetime
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlencode
+from PIL import Image
+from auth import login, logout
+from config import CAMERA_API_PATH
+from client import api_post
+from decoding import decode_response
+
+
+# Multiple of 3, so every chunk encodes to base64 without padding
+READ_SIZE = 3 * 64 * 1024
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 0x9003
+
+
+def _form_quote(b64):
+    """Percent-encode the three base64 characters that are not form-safe."""
+    return b64.replace(b'+', b'%2B').replace(b'/', b'%2F').replace(b'=', b'%3D')
+
+
+class SnapshotFormBody:
+    """urlencoded Save body whose imageData field is base64-encoded from the file while sending.
+
+    Only READ_SIZE bytes of the image are held at a time. The body length
+    is computed up front in one pass over the file so requests can send a
+    Content-Length; iterating again (for a retry) rereads the file.
+    """
+
+    def __init__(self, path, fields):
+        self.path = path
+        self.head = (urlencode(fields) + '&imageData=').encode()
+        self.length = len(self.head) + sum(len(chunk) for chunk in self._image_chunks())
+
+    def _image_chunks(self):
+        with open(self.path, 'rb') as f:
+            while True:
+                block = f.read(READ_SIZE)
+                if not block:
+                    return
+                yield _form_quote(base64.b64encode(block))
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        yield self.head
+        yield from self._image_chunks()
+
+
+def snapshot_fields(path, cam_name):
+    """Save fields for a local JPEG: camera name, capture time, size."""
+    with Image.open(path) as image:
+        width, height = image.size
+        taken = image.getexif().get_ifd(TAG_EXIF_IFD).get(TAG_DATETIME_ORIGINAL)
+
+    created = int(os.path.getmtime(path))
+    if taken:
+        try:
+            created = int(datetime.datetime.strptime(taken, '%Y:%m:%d %H:%M:%S').timestamp())
+        except ValueError:
+            pass
+
+    return {
+        'camName': cam_name,
+        'createdTm': created,
+        'width': width,
+        'height': height,
+        'byteSize': os.path.getsize(path)
+    }
+
+
+def upload_snapshot(sid, path, cam_name, nas=None):
+    """Save a local JPEG to the Synology snapshot database; returns the snapshot ID."""
+    params = {
+        'api': 'SYNO.SurveillanceStation.SnapShot',
+        'method': 'Save',
+        'version': '1',
+        '_sid': sid
+    }
+
+    try:
+        body = SnapshotFormBody(path, snapshot_fields(path, cam_name))
+        response = api_post(CAMERA_API_PATH, params, data=body, nas=nas, timeout=60,
+                            headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        response.raise_for_status()
+        result = decode_response(response)
+
+        if not result.get('success'):
+            errno = result.get('error', {}).get('code')
+            print(f"[ERROR] Upload of {path} failed with API code: {errno}")
+            return None
+
+        return result['data'].get('snapshotId')
+
+    except Exception as e:
+        print(f"[ERROR] Upload of {path} failed: {e}")
+        return None
+
+
+class IngestJournal:
+    """JSON-lines record of uploaded files, so an interrupted import resumes where it stopped.
+
+    A file counts as uploaded only with the same size and mtime, so images
+    replaced since the last run are uploaded again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.done.add((entry['path'], entry['size'], entry['mtime']))
+
+    @staticmethod
+    def _key(path):
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_size, int(stat.st_mtime)
+
+    def is_done(self, path):
+        return self._key(path) in self.done
+
+    def record(self, path, snapshot_id):
+        key = self._key(path)
+        with self.lock:
+            self.done.add(key)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'path': key[0], 'size': key[1], 'mtime': key[2],
+                                    'snapshotId': snapshot_id}) + '\n')
+
+
+def ingest_dir(sid, src_dir, cam_name, journal, nas=None, workers=4):
+    """Upload every JPEG in src_dir not yet in the journal; returns (uploaded, failed, skipped)."""
+    paths = [os.path.join(src_dir, name) for name in sorted(os.listdir(src_dir))
+             if os.path.splitext(name)[1].lower() in ('.jpg', '.jpeg')]
+    remaining = [p for p in paths if not journal.is_done(p)]
+    skipped = len(paths) - len(remaining)
+    todo = iter(remaining)
+
+    uploaded = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        while True:
+            # Queue at most one file per worker; each upload streams from disk
+            for path in todo:
+                pending[pool.submit(upload_snapshot, sid, path, cam_name, nas)] = path
+                if len(pending) >= workers:
+                    break
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                snapshot_id = future.result()
+                if snapshot_id is None:
+                    failed += 1
+                    continue
+                journal.record(path, snapshot_id)
+                uploaded += 1
+                print(f"[INFO] {os.path.basename(path)} saved as snapshot {snapshot_id} "
+                      f"({uploaded + skipped}/{len(paths)})")
+
+    return uploaded, failed, skipped
+
+
+def main():
+    """Upload a directory of local JPEGs as Surveillance Station snapshots."""
+    parser = argparse.ArgumentParser(description="Bulk import local images as snapshots.")
+    parser.add_argument('src', help="directory of JPEG files")
+    parser.add_argument('--camera-name', required=True, help="camera name stored with the snapshots")
+    parser.add_argument('--journal', default='ingest_journal.jsonl', help="progress journal file")
+    parser.add_argument('--workers', type=int, default=4, help="concurrent uploads")
+    args = parser.parse_args()
+
+    sid = login()
+    if not sid:
+        return
+
+    try:
+        uploaded, failed, skipped = ingest_dir(sid, args.src, args.camera_name,
+                                               IngestJournal(args.journal), workers=args.workers)
+        print(f"[SUCCESS] {uploaded} snapshot(s) uploaded, {skipped} already done, {failed} failed")
+    finally:
+        logout(sid)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Integrity module for Synology Surveillance Station.
+Container header checks and a manifest of verified recording downloads.
+"""
+
+import json
+import os
+import struct
+import threading
+
+
+def check_container(path):
+    """Check the container structure of a downloaded recording without reading it all.
+
+    MP4 files are checked by walking the top-level box headers, which must
+    start with 'ftyp' and add up exactly to the file size; this catches
+    truncated files with a few seeks. Matroska and MPEG-TS files only get
+    their signature checked. Returns (ok, reason).
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(12)
+
+        if len(head) >= 8 and head[4:8] == b'ftyp':
+            offset = 0
+            while offset < size:
+                f.seek(offset)
+                header = f.read(16)
+                if len(header) < 8:
+                    return False, f"truncated box header at {offset}"
+                box_size, box_type = struct.unpack('>I4s', header[:8])
+                if box_size == 1:
+                    if len(header) < 16:
+                        return False, f"truncated box header at {offset}"
+                    box_size = struct.unpack('>Q', header[8:16])[0]
+                elif box_size == 0:
+                    # Box extends to the end of the file
+                    box_size = size - offset
+                if box_size < 8:
+                    return False, f"invalid box size at {offset}"
+                offset += box_size
+            if offset != size:
+                return False, f"last box ends at {offset}, file is {size} bytes"
+            return True, 'mp4'
+
+        if head[:4] == b'\x1a\x45\xdf\xa3':
+            return True, 'matroska'
+        if head[:1] == b'\x47':
+            return True, 'mpeg-ts'
+
+    return False, "unknown container signature"
+
+
+class VerifyManifest:
+    """Append-only JSON-lines manifest of recordings whose download was verified."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['file']] = entry
+
+    def is_verified(self, file_name, rec_id):
+        """Tell whether file_name holds a verified copy of rec_id (checked by size, not re-read)."""
+        entry = self.entries.get(os.path.abspath(file_name))
+        if not entry or str(entry['rec_id']) != str(rec_id):
+            return False
+        try:
+            return os.path.getsize(file_name) == entry['size']
+        except OSError:
+            return False
+
+    def record(self, file_name, rec_id, size, digest):
+        entry = {
+            'file': os.path.abspath(file_name),
+            'rec_id': rec_id,
+            'size': size,
+            'sha256': digest
+        }
+        with self.lock:
+            self.entries[entry['file']] = entry
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
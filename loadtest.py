@@ -0,0 +1,461 @@
+"""
+Load test module for Synology Surveillance Station.
+Drives the client functions with a configurable mix of concurrent operations against a NAS or a local emulator.
+
+Example: 20 operations per second for one hour against the emulator
+    python loadtest.py --emulator --rate 20 --duration 3600 --mix snapshot=5,list=2,ptz=2,export=0.2
+"""
+
+import argparse
+import base64
+import io
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+from PIL import Image
+from auth import login, logout
+from camera import get_cameras_list
+from client import NASClient
+from models import Camera, Recording
+from recording import rec_list, rec_download
+from PTZ import PTZController
+from snapshot import take_snapshot, get_snapshot_list
+
+
+OPERATIONS = ('ptz', 'snapshot', 'list', 'export')
+
+
+class LoadEmulator(ThreadingHTTPServer):
+    """Local stand-in for Surveillance Station with configurable latency and error rate.
+
+    It answers the calls the load test makes (login, API info, camera,
+    snapshot, PTZ and recording APIs), whatever the request path.
+    Recording downloads are valid MP4 files of recording_size bytes.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.02, error_rate=0.0, cameras=4, recording_size=8 * 1024 * 1024):
+        super().__init__(address, _EmulatorRequestHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.cameras = cameras
+        self.recording_size = max(24, recording_size)
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (1280, 720), (40, 80, 120)).save(buffer, format='JPEG', quality=80)
+        self.jpeg = buffer.getvalue()
+        self.jpeg_base64 = base64.b64encode(self.jpeg).decode()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _EmulatorRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._handle(dict(parse_qsl(urlparse(self.path).query)))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length).decode(errors='replace') if length else ''
+        params = dict(parse_qsl(urlparse(self.path).query))
+        params.update(parse_qsl(body))
+        self._handle(params)
+
+    def _handle(self, params):
+        server = self.server
+        if server.latency:
+            time.sleep(random.expovariate(1 / server.latency))
+
+        call = (params.get('api', ''), params.get('method', ''))
+        if call[0] != 'SYNO.API.Auth' and random.random() < server.error_rate:
+            self._reply({'success': False, 'error': {'code': 400}})
+            return
+
+        if call == ('SYNO.SurveillanceStation.Recording', 'Download'):
+            self._send_recording()
+            return
+
+        self._reply({'success': True, 'data': self._data(call, params)})
+
+    def _data(self, call, params):
+        server = self.server
+        now = int(time.time())
+        api, method = call
+
+        if api == 'SYNO.API.Auth':
+            return {'sid': 'emulator'} if method == 'login' else {}
+        if api == 'SYNO.API.Info':
+            names = ('SYNO.API.Auth', 'SYNO.SurveillanceStation.Camera', 'SYNO.SurveillanceStation.PTZ',
+                     'SYNO.SurveillanceStation.SnapShot', 'SYNO.SurveillanceStation.Recording')
+            return {name: {'path': 'entry.cgi', 'minVersion': 1, 'maxVersion': 9} for name in names}
+        if call == ('SYNO.SurveillanceStation.Camera', 'List'):
+            return {'cameras': [{'id': i, 'dsId': 0, 'newName': f"Camera {i}", 'model': 'Emulator',
+                                 'status': 1, 'enabled': True} for i in range(1, server.cameras + 1)]}
+        if call == ('SYNO.SurveillanceStation.SnapShot', 'TakeSnapshot'):
+            return {'camName': f"Camera {params.get('camId')}", 'createdTm': now, 'width': 1280,
+                    'height': 720, 'byteSize': len(server.jpeg), 'imageData': server.jpeg_base64}
+        if call == ('SYNO.SurveillanceStation.SnapShot', 'List'):
+            snapshots = [{'id': i, 'camId': params.get('camId'), 'createdTm': now - i * 60,
+                          'byteSize': len(server.jpeg), 'fileName': f"{i}.jpg"} for i in range(1, 51)]
+            return {'data': snapshots, 'total': len(snapshots)}
+        if call == ('SYNO.SurveillanceStation.Recording', 'List'):
+            return {'recordings': [{'id': i, 'cameraId': (i - 1) % server.cameras + 1,
+                                    'startTime': now - i * 600, 'stopTime': now - i * 600 + 300,
+                                    'sizeByte': server.recording_size} for i in range(1, 21)]}
+        return {}
+
+    def _send_recording(self):
+        size = self.server.recording_size
+        ftyp = b'\x00\x00\x00\x10ftypisom\x00\x00\x00\x00'
+        mdat = (size - len(ftyp)).to_bytes(4, 'big') + b'mdat'
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(size))
+        self.end_headers()
+        self.wfile.write(ftyp + mdat)
+
+        chunk = bytes(1024 * 1024)
+        remaining = size - len(ftyp) - len(mdat)
+        while remaining > 0:
+            n = min(remaining, len(chunk))
+            self.wfile.write(chunk[:n])
+            remaining -= n
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def build_operations(sid, cameras, recordings, export_dir, nas=None):
+    """Return {operation name: callable returning True on success} over the real client functions."""
+    counter = itertools.count()
+
+    def ptz():
+        controller = PTZController(sid, random.choice(cameras).id, nas=nas)
+        direction = random.choice(('up', 'down', 'left', 'right'))
+        return controller.ptz_move(direction, 'Start') and controller.ptz_move(direction, 'Stop')
+
+    def snapshot():
+        cam = random.choice(cameras)
+        return take_snapshot(sid, cam.id, cam.ds_id, nas=nas) is not None
+
+    def snapshot_list():
+        return get_snapshot_list(sid, random.choice(cameras).id, nas=nas) is not None
+
+    def export():
+        path = os.path.join(export_dir, f"loadtest_{next(counter)}.mp4")
+        try:
+            return rec_download(sid, random.choice(recordings).id, path, nas=nas, retries=0) is not None
+        finally:
+            for leftover in (path, path + '.part'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    operations = {'ptz': ptz, 'snapshot': snapshot, 'list': snapshot_list}
+    if recordings:
+        operations['export'] = export
+    return operations
+
+
+def parse_mix(text):
+    """Parse 'snapshot=5,list=2' into {'snapshot': 5.0, 'list': 2.0}."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def slope_per_hour(samples):
+    """Least-squares slope of (seconds, value) samples, per hour."""
+    n = len(samples)
+    if n < 2:
+        return 0.0
+    mean_t = sum(t for t, _ in samples) / n
+    mean_v = sum(v for _, v in samples) / n
+    var = sum((t - mean_t) ** 2 for t, _ in samples)
+    if not var:
+        return 0.0
+    return sum((t - mean_t) * (v - mean_v) for t, v in samples) / var * 3600
+
+
+def resource_usage():
+    """Current RSS (bytes), open file descriptors and traced Python heap of this process."""
+    rss = None
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        try:
+            import resource
+            # Peak rather than current RSS where /proc is missing
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            pass
+
+    fds = len(os.listdir('/proc/self/fd')) if os.path.isdir('/proc/self/fd') else None
+    heap = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+    return {'rss': rss, 'fds': fds, 'heap': heap}
+
+
+class LoadTest:
+    """Open-loop load generator with per-interval throughput, latency and error reports.
+
+    Operations arrive as a Poisson process of `rate` per second, picked by
+    the mix weights. At most `concurrency` run at once; arrivals beyond that
+    are counted as dropped, which shows the client or NAS cannot keep up.
+    Every interval RSS, Python heap and open file descriptors are sampled;
+    steady growth over at least trend_window seconds after the warm-up is
+    reported as a possible leak.
+    """
+
+    def __init__(self, operations, mix, rate, concurrency=32, interval=10.0, warmup=60.0,
+                 memory_limit_mb_per_hour=50.0, fd_limit_per_hour=10.0, trend_window=600.0, out=None):
+        self.operations = operations
+        self.names = [name for name in mix if name in operations]
+        if not self.names:
+            raise ValueError("No runnable operation in the mix")
+        self.weights = [mix[name] for name in self.names]
+        self.rate = rate
+        self.concurrency = concurrency
+        self.interval = interval
+        self.warmup = warmup
+        self.memory_limit = memory_limit_mb_per_hour * 1024 * 1024
+        self.fd_limit = fd_limit_per_hour
+        self.trend_window = trend_window
+        self.out = out or sys.stdout
+
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.current = {}
+        self.totals = {name: [0, 0, 0] for name in self.names}
+        self.dropped = 0
+        self.resources = []
+        self.p95_history = []
+        self.started = None
+
+    def _run_one(self, name):
+        start = time.perf_counter()
+        raised = False
+        try:
+            ok = bool(self.operations[name]())
+        except Exception:
+            # A client bug or broken setup, not a failed NAS call
+            ok = False
+            raised = True
+        finally:
+            self.slots.release()
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            latencies, errors = self.current.setdefault(name, ([], [0, 0]))
+            latencies.append(elapsed)
+            totals = self.totals[name]
+            totals[0] += 1
+            if raised:
+                errors[1] += 1
+                totals[2] += 1
+            elif not ok:
+                errors[0] += 1
+                totals[1] += 1
+
+    def report(self):
+        """Print one interval's statistics and check resource trends."""
+        with self.lock:
+            current, self.current = self.current, {}
+            dropped, self.dropped = self.dropped, 0
+
+        elapsed = time.monotonic() - self.started
+        write = self.out.write
+        write(f"\n[INFO] t={elapsed:7.0f}s\n")
+        all_latencies = []
+        for name in self.names:
+            latencies, errors = current.get(name, ([], [0, 0]))
+            latencies.sort()
+            all_latencies.extend(latencies)
+            count = len(latencies)
+            error_pct = errors[0] / count * 100 if count else 0.0
+            exc_pct = errors[1] / count * 100 if count else 0.0
+            write(f"  {name:9} {count / self.interval:7.1f}/s  err {error_pct:5.1f}%  exc {exc_pct:5.1f}%  "
+                  f"p50 {percentile(latencies, 0.50) * 1000:7.1f} ms  "
+                  f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms  "
+                  f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms\n")
+
+        usage = resource_usage()
+        rss = f"{usage['rss'] / 1024 ** 2:.1f} MB" if usage['rss'] is not None else 'n/a'
+        heap = f"{usage['heap'] / 1024 ** 2:.1f} MB" if usage['heap'] is not None else 'n/a'
+        write(f"  resources rss {rss}  heap {heap}  fds {usage['fds']}  dropped {dropped}\n")
+
+        if elapsed >= self.warmup:
+            self.resources.append((elapsed, usage))
+            all_latencies.sort()
+            self.p95_history.append((elapsed, percentile(all_latencies, 0.95)))
+            self._check_trends()
+        self.out.flush()
+
+    def _check_trends(self):
+        # Short runs extrapolate noise into huge hourly rates
+        if len(self.resources) < 6 or self.resources[-1][0] - self.resources[0][0] < self.trend_window:
+            return
+        write = self.out.write
+
+        checks = (('rss', self.memory_limit, 1024 ** 2, 'MB'),
+                  ('heap', self.memory_limit, 1024 ** 2, 'MB'),
+                  ('fds', self.fd_limit, 1, 'descriptors'))
+        for key, limit, scale, unit in checks:
+            samples = [(t, u[key]) for t, u in self.resources if u[key] is not None]
+            if len(samples) < 6:
+                continue
+            growth = slope_per_hour(samples)
+            # Growth must be both steep and visible in the data, not one burst
+            if growth > limit and samples[-1][1] > samples[len(samples) // 2][1]:
+                write(f"  [WARNING] {key} growing {growth / scale:.1f} {unit}/hour since warm-up\n")
+
+        first = [p for _, p in self.p95_history[:len(self.p95_history) // 4 or 1]]
+        last = [p for _, p in self.p95_history[-(len(self.p95_history) // 4 or 1):]]
+        if first and last and sum(first) and sum(last) / len(last) > 2 * sum(first) / len(first):
+            write(f"  [WARNING] p95 latency doubled since warm-up "
+                  f"({sum(first) / len(first) * 1000:.0f} -> {sum(last) / len(last) * 1000:.0f} ms)\n")
+
+    def run(self, duration):
+        """Generate load for duration seconds; returns {operation: (count, errors, exceptions)}."""
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.started = time.monotonic()
+        end = self.started + duration
+        next_report = self.started + self.interval
+        next_arrival = self.started
+
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= next_report:
+                    self.report()
+                    next_report += self.interval
+                if now >= end:
+                    break
+                if next_arrival > now:
+                    time.sleep(min(next_arrival, next_report, end) - now)
+                    continue
+
+                next_arrival += random.expovariate(self.rate)
+                name = random.choices(self.names, self.weights)[0]
+                if self.slots.acquire(blocking=False):
+                    pool.submit(self._run_one, name)
+                else:
+                    with self.lock:
+                        self.dropped += 1
+        finally:
+            pool.shutdown(wait=True)
+
+        return {name: tuple(self.totals[name]) for name in self.names}
+
+
+def main():
+    """Run a load or soak test."""
+    parser = argparse.ArgumentParser(description="Load and soak test for the Surveillance Station client.")
+    parser.add_argument('--rate', type=float, default=10.0, help="operations per second (Poisson arrivals)")
+    parser.add_argument('--mix', default='snapshot=5,list=2,ptz=1,export=0.1',
+                        help="operation weights, from: " + ', '.join(OPERATIONS))
+    parser.add_argument('--duration', type=float, default=300.0, help="seconds")
+    parser.add_argument('--interval', type=float, default=10.0, help="seconds between reports")
+    parser.add_argument('--warmup', type=float, default=60.0, help="seconds before resource trends are tracked")
+    parser.add_argument('--concurrency', type=int, default=32, help="maximum operations in flight")
+    parser.add_argument('--cameras', help="comma-separated camera IDs to use (default: all)")
+    parser.add_argument('--emulator', action='store_true', help="run against a local emulator instead of the NAS")
+    parser.add_argument('--emulator-latency', type=float, default=0.02, help="mean emulator latency in seconds")
+    parser.add_argument('--emulator-errors', type=float, default=0.0, help="fraction of emulator calls that fail")
+    parser.add_argument('--trace-heap', action='store_true', help="track the Python heap with tracemalloc (slower)")
+    parser.add_argument('--verbose', action='store_true', help="keep the client functions' output")
+    args = parser.parse_args()
+
+    nas = None
+    emulator = None
+    if args.emulator:
+        emulator = LoadEmulator(('127.0.0.1', 0), latency=args.emulator_latency).start()
+        nas = NASClient('emulator', '127.0.0.1', emulator.server_address[1], 'loadtest', 'loadtest',
+                        pool_size=args.concurrency)
+
+    sid = login(nas=nas)
+    if not sid:
+        return
+
+    out = sys.stdout
+    export_dir = tempfile.mkdtemp(prefix='loadtest_')
+    if args.trace_heap:
+        tracemalloc.start()
+    try:
+        cameras = [Camera.from_api(c) for c in get_cameras_list(sid, nas=nas, verbose=False) or []]
+        if args.cameras:
+            wanted = {int(v) for v in args.cameras.split(',')}
+            cameras = [c for c in cameras if c.id in wanted]
+        if not cameras:
+            print("[ERROR] No cameras to test")
+            return
+        recordings = [Recording.from_api(r) for r in rec_list(sid, nas=nas) or []]
+
+        operations = build_operations(sid, cameras, recordings, export_dir, nas=nas)
+        test = LoadTest(operations, parse_mix(args.mix), args.rate, concurrency=args.concurrency,
+                        interval=args.interval, warmup=args.warmup, out=out)
+        print(f"[INFO] Load test: {args.rate}/s for {args.duration:.0f}s, "
+              f"mix {', '.join(test.names)}, {len(cameras)} camera(s)")
+
+        if emulator:
+            # Only the load itself sees injected errors, not the setup calls
+            emulator.error_rate = args.emulator_errors
+        if not args.verbose:
+            sys.stdout = open(os.devnull, 'w')
+        try:
+            totals = test.run(args.duration)
+        finally:
+            if sys.stdout is not out:
+                sys.stdout.close()
+                sys.stdout = out
+
+        print("\n[SUCCESS] Load test finished")
+        for name, (count, errors, exceptions) in totals.items():
+            print(f"  {name:9} {count:8} calls  {errors:6} errors "
+                  f"({errors / count * 100 if count else 0:.1f}%)  {exceptions:6} exceptions")
+    except KeyboardInterrupt:
+        print("\n[INFO] Load test stopped")
+    finally:
+        sys.stdout = out
+        tracemalloc.stop()
+        shutil.rmtree(export_dir, ignore_errors=True)
+        logout(sid, nas=nas)
+        if emulator:
+            emulator.shutdown()
+
+
+if __name__ == "__main__":
+    main()
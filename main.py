@@ -3,12 +3,14 @@ Main entry point for Synology Surveillance Station API Client.
 Provides an interactive CLI menu for camera management, snapshot capture, and recording download.
 """
 
+import argparse
 from auth import login, logout
 from info import get_info
-from camera import get_cameras_list, get_capability_by_cam_id, get_live_path, enable, disable
+from camera import get_cameras_list, get_capability_by_cam_id, get_live_path, set_cameras_enabled
 from PTZ import show_preset, ptz_controller
 from snapshot import take_snapshot, download_snapshot, get_snapshot_list, save_snapshot, show_snapshot, delete_snapshots
 from recording import rec_list, rec_download
+from models import Camera, Recording, Preset, SnapshotTable
 
 
 def print_header(title):
@@ -41,9 +43,9 @@ def select_camera(cameras):
             cam_id_selected = int(cam_input)
             
             for cam in cameras:
-                if cam_id_selected == cam.get('id'):
-                    cam_id = cam.get('id')
-                    ds_id = cam.get('dsId')
+                if cam_id_selected == cam.id:
+                    cam_id = cam.id
+                    ds_id = cam.ds_id
                     print_success(f"Camera selected: ID={cam_id},"
                                   f" dsId={ds_id}")
                     return cam_id, ds_id
@@ -113,11 +115,12 @@ def handle_snapshot_download(sid, cam_id):
     if not snap_list:
         return
     
+    snaps = SnapshotTable.from_api(snap_list)
+    del snap_list
+    
     print("\nAvailable Snapshots:")
-    for snap in snap_list:
-        print(f"ID: {snap['id']:<5} | {snap['fileName']:^60} | Camera: {snap['camName']}")
-
-    snap_dict = {snap['id']: snap for snap in snap_list}
+    for snap in snaps:
+        print(f"ID: {snap.id:<5} | {snap.file_name:^60} | Camera: {snap.cam_name}")
     
     while True:
         snap_id_input = input('\nSnapshot ID to download (Q to exit): ').strip()
@@ -132,7 +135,7 @@ def handle_snapshot_download(sid, cam_id):
         
         snap_id = int(snap_id_input)
         
-        if snap_id not in snap_dict:
+        if snap_id not in snaps:
             print_error(f"ID {snap_id} not found")
             continue
         
@@ -158,8 +161,8 @@ def handle_recording_list(sid):
         return
     
     print("\nAvailable Recordings:")
-    for rec in recordings:
-        print(f"ID: {rec['id']:<10} | Camera ID: {rec['cameraId']}")
+    for rec in map(Recording.from_api, recordings):
+        print(f"ID: {rec.id:<10} | Camera ID: {rec.camera_id}")
 
 
 def handle_recording_download(sid):
@@ -184,8 +187,8 @@ def handle_preset_list(sid, cam_id):
         return
     
     print("\nAvailable PTZ Presets:")
-    for preset in presets:
-        print(f"ID: {preset['id']:<5} | Name: {preset['name']}")
+    for preset in map(Preset.from_api, presets):
+        print(f"ID: {preset.id:<5} | Name: {preset.name}")
 
 
 def handle_get_live_path(sid, cam_id):
@@ -198,15 +201,23 @@ def handle_get_live_path(sid, cam_id):
     
 
 def handle_enable_disable_camera(sid, cam_id):
-    """Handle camera disable or enable"""
-    print(f"Do you want to enable or disable camera: {cam_id}?")
+    """Handle camera disable or enable for one or more cameras"""
+    ids_input = input(f"Camera IDs, comma separated (Enter for camera {cam_id}): ").strip()
+    
+    try:
+        cam_ids = [int(i) for i in ids_input.split(',') if i.strip()] or [cam_id]
+    except ValueError:
+        print_error("Invalid input. Please enter integer camera IDs.")
+        return
+    
+    print(f"Do you want to enable or disable camera(s): {cam_ids}?")
     print("[E]: Enable      [D]: Disable ")
     c = input()
     c = c.upper()
     if c == "E":
-        enable(sid, cam_id)
+        set_cameras_enabled(sid, {i: True for i in cam_ids})
     elif c == "D":
-        disable(sid, cam_id)
+        set_cameras_enabled(sid, {i: False for i in cam_ids})
     else:
         print("Invalid command.")
 
@@ -219,11 +230,12 @@ def handle_delete_snap(sid, cam_id):
         print_error("No snapshots found")
         return
     
+    snaps = SnapshotTable.from_api(snap_list)
+    del snap_list
+    
     print("\nAvailable Snapshots:")
-    for snap in snap_list:
-        print(f"ID: {snap['id']:<5} | {snap['fileName']:^60} | Camera: {snap['camName']}")
-
-    snap_dict = {snap['id']: snap for snap in snap_list}
+    for snap in snaps:
+        print(f"ID: {snap.id:<5} | {snap.file_name:^60} | Camera: {snap.cam_name}")
     
     # Lista per raccogliere gli ID da eliminare
     ids_to_delete = []
@@ -240,7 +252,7 @@ def handle_delete_snap(sid, cam_id):
         
         snap_id = int(snap_id_input)
         
-        if snap_id not in snap_dict:
+        if snap_id not in snaps:
             print_error(f"ID {snap_id} not found")
             continue
         
@@ -251,7 +263,7 @@ def handle_delete_snap(sid, cam_id):
         
         # Aggiungi alla lista
         ids_to_delete.append(snap_id)
-        print_success(f"Snapshot {snap_id} ({snap_dict[snap_id]['fileName']}) marked for deletion")
+        print_success(f"Snapshot {snap_id} ({snaps.get(snap_id).file_name}) marked for deletion")
     
     # Dopo l'uscita dal ciclo, elimina tutto
     if not ids_to_delete:
@@ -261,7 +273,7 @@ def handle_delete_snap(sid, cam_id):
     # Conferma finale
     print(f"\nAbout to delete {len(ids_to_delete)} snapshot(s):")
     for snap_id in ids_to_delete:
-        print(f"{snap_id}: {snap_dict[snap_id]['fileName']}")
+        print(f"{snap_id}: {snaps.get(snap_id).file_name}")
     
     confirm = input("\nConfirm deletion? (yes/no): ").strip().lower()
     
@@ -289,7 +301,7 @@ def display_menu():
     print("[8] Download Recording (by ID)")
     print("[9] Show List of PTZ Presets")
     print("[10] Show RTSP live Info")
-    print("[11] Enable/Disable selected camera")
+    print("[11] Enable/Disable camera(s)")
     print("[0] Logout and Exit")
     print("=" * 50)
 
@@ -313,6 +325,7 @@ def main():
         cameras = get_cameras_list(sid)
         if not cameras:
             return
+        cameras = [Camera.from_api(cam) for cam in cameras]
         
         # Select camera
         cam_id, ds_id = select_camera(cameras)
@@ -365,5 +378,18 @@ def main():
             logout(sid)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Synology Surveillance Station API client.")
+    parser.add_argument('--profile', metavar='DIR', nargs='?', const='profile',
+                        help="profile the session and write the reports to DIR (default: ./profile)")
+    parser.add_argument('--top', type=int, default=20, help="entries per section of the profile report")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.profile:
+        from profiling import run_profiled
+        run_profiled(main, args.profile, top=args.top)
+    else:
+        main()
@@ -0,0 +1,170 @@
+"""
+Data models for Synology Surveillance Station.
+Compact slotted classes for API results and a columnar container for large snapshot listings.
+"""
+
+from array import array
+
+
+class Camera:
+    """Camera entry from SYNO.SurveillanceStation.Camera List."""
+
+    __slots__ = ('id', 'ds_id', 'name', 'model', 'vendor', 'video_codec', 'status', 'enabled')
+
+    def __init__(self, id, ds_id=0, name='', model='', vendor='', video_codec=None, status=None, enabled=None):
+        self.id = id
+        self.ds_id = ds_id
+        self.name = name
+        self.model = model
+        self.vendor = vendor
+        self.video_codec = video_codec
+        self.status = status
+        self.enabled = enabled
+
+    @classmethod
+    def from_api(cls, d):
+        return cls(d.get('id'), d.get('dsId', 0), d.get('newName', d.get('name', '')),
+                   d.get('model', ''), d.get('vendor', ''), d.get('videoCodec'),
+                   d.get('status'), d.get('enabled'))
+
+    def __repr__(self):
+        return f"Camera(id={self.id}, ds_id={self.ds_id}, model={self.model!r})"
+
+
+class Snapshot:
+    """Saved snapshot entry from SYNO.SurveillanceStation.SnapShot List."""
+
+    __slots__ = ('id', 'cam_id', 'cam_name', 'file_name', 'created_tm', 'byte_size')
+
+    def __init__(self, id, cam_id=0, cam_name='', file_name='', created_tm=0, byte_size=0):
+        self.id = id
+        self.cam_id = cam_id
+        self.cam_name = cam_name
+        self.file_name = file_name
+        self.created_tm = created_tm
+        self.byte_size = byte_size
+
+    @classmethod
+    def from_api(cls, d):
+        return cls(d.get('id'), d.get('camId', 0), d.get('camName', ''), d.get('fileName', ''),
+                   d.get('createdTm', 0), d.get('byteSize', 0))
+
+    def __repr__(self):
+        return f"Snapshot(id={self.id}, cam_name={self.cam_name!r}, file_name={self.file_name!r})"
+
+
+class Recording:
+    """Recording entry from SYNO.SurveillanceStation.Recording List."""
+
+    __slots__ = ('id', 'camera_id', 'camera_name', 'start_time', 'stop_time', 'size_byte')
+
+    def __init__(self, id, camera_id=0, camera_name='', start_time=0, stop_time=0, size_byte=0):
+        self.id = id
+        self.camera_id = camera_id
+        self.camera_name = camera_name
+        self.start_time = start_time
+        self.stop_time = stop_time
+        self.size_byte = size_byte
+
+    @classmethod
+    def from_api(cls, d):
+        return cls(d.get('id'), d.get('cameraId', 0), d.get('cameraName', ''),
+                   d.get('startTime', 0), d.get('stopTime', 0), d.get('sizeByte', 0))
+
+    def __repr__(self):
+        return f"Recording(id={self.id}, camera_id={self.camera_id})"
+
+
+class Preset:
+    """PTZ preset entry from SYNO.SurveillanceStation.PTZ ListPreset."""
+
+    __slots__ = ('id', 'name')
+
+    def __init__(self, id, name=''):
+        self.id = id
+        self.name = name
+
+    @classmethod
+    def from_api(cls, d):
+        return cls(d.get('id'), d.get('name', ''))
+
+    def __repr__(self):
+        return f"Preset(id={self.id}, name={self.name!r})"
+
+
+class SnapshotTable:
+    """Columnar, array-backed container for large snapshot listings.
+
+    Numbers live in typed arrays, camera names are stored once each, and
+    file names are packed into one UTF-8 buffer with an offset array.
+    Rows are materialized as Snapshot objects only when accessed.
+    """
+
+    def __init__(self):
+        self.ids = array('q')
+        self.cam_ids = array('q')
+        self.created_tms = array('q')
+        self.byte_sizes = array('q')
+        self.cam_name_refs = array('I')
+        self.cam_names = []
+        self.name_offsets = array('Q', [0])
+        self.names = bytearray()
+        self._cam_name_index = {}
+        self._row_by_id = None
+
+    @classmethod
+    def from_api(cls, snapshots):
+        table = cls()
+        for d in snapshots:
+            table.append(d)
+        return table
+
+    def append(self, d):
+        """Append one snapshot dict as returned by the List API."""
+        self.ids.append(d.get('id', 0))
+        self.cam_ids.append(d.get('camId', 0))
+        self.created_tms.append(d.get('createdTm', 0))
+        self.byte_sizes.append(d.get('byteSize', 0))
+
+        cam_name = d.get('camName', '')
+        ref = self._cam_name_index.get(cam_name)
+        if ref is None:
+            ref = self._cam_name_index[cam_name] = len(self.cam_names)
+            self.cam_names.append(cam_name)
+        self.cam_name_refs.append(ref)
+
+        self.names += d.get('fileName', '').encode()
+        self.name_offsets.append(len(self.names))
+        self._row_by_id = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return Snapshot(self.ids[row], self.cam_ids[row], self.cam_names[self.cam_name_refs[row]],
+                        self.file_name(row), self.created_tms[row], self.byte_sizes[row])
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def file_name(self, row):
+        return self.names[self.name_offsets[row]:self.name_offsets[row + 1]].decode()
+
+    def row_of(self, snap_id):
+        """Return the row of a snapshot ID, or None; the ID map is built on first use."""
+        if self._row_by_id is None:
+            self._row_by_id = {snap_id: row for row, snap_id in enumerate(self.ids)}
+        return self._row_by_id.get(snap_id)
+
+    def get(self, snap_id):
+        """Return the Snapshot with this ID, or None."""
+        row = self.row_of(snap_id)
+        return None if row is None else self[row]
+
+    def __contains__(self, snap_id):
+        return self.row_of(snap_id) is not None
@@ -0,0 +1,211 @@
+"""
+Mosaic module for Synology Surveillance Station.
+Live grid view of all cameras with JPEG decoding spread over a bounded process pool.
+"""
+
+import argparse
+import base64
+import io
+import math
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from PIL import Image
+from auth import login, logout
+from camera import get_cameras_list
+from snapshot import take_snapshot
+
+
+def decode_tile(jpeg_bytes, tile_size):
+    """Decode a JPEG scaled to fit tile_size; runs in a worker process.
+
+    draft() lets the JPEG decoder skip to a reduced DCT scale, so the full
+    resolution image is never built.
+    """
+    image = Image.open(io.BytesIO(jpeg_bytes))
+    image.draft('RGB', tile_size)
+    image = image.convert('RGB')
+    image.thumbnail(tile_size)
+    return image.size, image.tobytes()
+
+
+class FileRenderer:
+    """Render the mosaic into an image file, rewritten only when a tile changed."""
+
+    def __init__(self, path, grid, tile_size):
+        self.path = path
+        self.tile_size = tile_size
+        self.columns = grid[0]
+        self.canvas = Image.new('RGB', (grid[0] * tile_size[0], grid[1] * tile_size[1]))
+        self.dirty = False
+
+    def update_tile(self, index, image):
+        x = (index % self.columns) * self.tile_size[0]
+        y = (index // self.columns) * self.tile_size[1]
+        # The thumbnail can be smaller than the tile; clear what the last frame left
+        self.canvas.paste((0, 0, 0), (x, y, x + self.tile_size[0], y + self.tile_size[1]))
+        self.canvas.paste(image, (x, y))
+        self.dirty = True
+
+    def flush(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + '.tmp'
+        self.canvas.save(tmp_path, format='JPEG', quality=85)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def alive(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class TkRenderer:
+    """Render the mosaic in a Tk window with one label per tile."""
+
+    def __init__(self, grid, tile_size, title="Surveillance Mosaic"):
+        import tkinter
+        from PIL import ImageTk
+
+        self.image_tk = ImageTk
+        self.root = tkinter.Tk()
+        self.root.title(title)
+        self.root.configure(background='black')
+        self.root.protocol('WM_DELETE_WINDOW', self.close)
+        self.labels = []
+        self.photos = {}
+        self.open = True
+
+        self.blank = ImageTk.PhotoImage(Image.new('RGB', tile_size))
+        for index in range(grid[0] * grid[1]):
+            label = tkinter.Label(self.root, image=self.blank, background='black')
+            label.grid(row=index // grid[0], column=index % grid[0])
+            self.labels.append(label)
+
+    def update_tile(self, index, image):
+        # Keep a reference: Tk drops images that are garbage collected
+        self.photos[index] = self.image_tk.PhotoImage(image)
+        self.labels[index].configure(image=self.photos[index])
+
+    def flush(self):
+        if self.open:
+            self.root.update()
+
+    def alive(self):
+        return self.open
+
+    def close(self):
+        if self.open:
+            self.open = False
+            self.root.destroy()
+
+
+class MosaicViewer:
+    """Refresh a grid of camera tiles at a target rate, re-rendering only changed tiles."""
+
+    def __init__(self, sid, cameras, renderer, tile_size=(320, 180), fps=1.0,
+                 decode_workers=4, capture_workers=8, nas=None):
+        self.sid = sid
+        self.cameras = cameras
+        self.renderer = renderer
+        self.tile_size = tile_size
+        self.period = 1.0 / fps
+        self.nas = nas
+        self.checksums = [None] * len(cameras)
+        self.decode_pool = ProcessPoolExecutor(max_workers=decode_workers)
+        self.capture_pool = ThreadPoolExecutor(max_workers=capture_workers)
+
+    def capture(self, cam):
+        snap = take_snapshot(self.sid, cam.get('id'), cam.get('dsId'), nas=self.nas)
+        return base64.b64decode(snap['imageData']) if snap else None
+
+    def refresh(self):
+        """Capture all cameras once and redraw the tiles whose image changed."""
+        frames = list(self.capture_pool.map(self.capture, self.cameras))
+
+        pending = {}
+        for index, jpeg_bytes in enumerate(frames):
+            if jpeg_bytes is None:
+                continue
+            checksum = zlib.crc32(jpeg_bytes)
+            if checksum == self.checksums[index]:
+                continue
+            pending[index] = (checksum, self.decode_pool.submit(decode_tile, jpeg_bytes, self.tile_size))
+
+        for index, (checksum, future) in pending.items():
+            try:
+                size, pixels = future.result()
+                self.renderer.update_tile(index, Image.frombytes('RGB', size, pixels))
+                # Only a drawn frame counts; a failed decode is retried next refresh
+                self.checksums[index] = checksum
+            except Exception as e:
+                print(f"[ERROR] Tile decode failed for camera {self.cameras[index].get('id')}: {e}")
+
+        self.renderer.flush()
+        return len(pending)
+
+    def run(self):
+        """Refresh at the target rate until the renderer is closed or interrupted."""
+        try:
+            while self.renderer.alive():
+                started = time.monotonic()
+                self.refresh()
+                delay = self.period - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+        finally:
+            self.close()
+
+    def close(self):
+        self.capture_pool.shutdown()
+        self.decode_pool.shutdown()
+        self.renderer.close()
+
+
+def grid_for(count, columns=None):
+    """Return (columns, rows) of a grid that fits count tiles."""
+    columns = columns or max(1, math.ceil(math.sqrt(count)))
+    return columns, max(1, math.ceil(count / columns))
+
+
+def main():
+    """Show a live mosaic of every camera."""
+    parser = argparse.ArgumentParser(description="Live mosaic of all Surveillance Station cameras.")
+    parser.add_argument('--fps', type=float, default=1.0, help="target refreshes per second")
+    parser.add_argument('--tile', default='320x180', help="tile size WxH")
+    parser.add_argument('--columns', type=int)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help="decode processes")
+    parser.add_argument('--output', help="write the mosaic to this JPEG instead of opening a window")
+    args = parser.parse_args()
+
+    tile_size = tuple(int(v) for v in args.tile.lower().split('x'))
+
+    sid = login()
+    if not sid:
+        return
+
+    try:
+        cameras = get_cameras_list(sid, verbose=False)
+        if not cameras:
+            return
+
+        grid = grid_for(len(cameras), args.columns)
+        if args.output:
+            renderer = FileRenderer(args.output, grid, tile_size)
+        else:
+            renderer = TkRenderer(grid, tile_size)
+
+        viewer = MosaicViewer(sid, cameras, renderer, tile_size=tile_size,
+                              fps=args.fps, decode_workers=args.workers)
+        viewer.run()
+    except KeyboardInterrupt:
+        print("\n[INFO] Mosaic stopped")
+    finally:
+        logout(sid)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Profiling module for Synology Surveillance Station.
+Per-phase wall-time spans plus cProfile and tracemalloc reports for a profiled run.
+
+Spans are only recorded after enable(); until then span() and timed_iter()
+cost one flag check. Phases recorded by the client modules:
+    connect+first byte, body   HTTP request (client.api_get/api_post)
+    decode                     JSON parsing (decoding), under the call's span
+    base64, display            snapshot preview (snapshot.show_snapshot)
+    write, hash                file output (recording, snapshot)
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+
+ENABLED = False
+
+_lock = threading.Lock()
+_local = threading.local()
+_totals = defaultdict(float)   # folded stack -> self time in seconds
+_counts = defaultdict(int)     # folded stack -> number of spans
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+        _counts.clear()
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _add(stack, name, seconds, child_seconds=0.0, count=1):
+    """Add a finished span; its own time excludes the time of nested spans."""
+    key = ';'.join([entry[0] for entry in stack] + [name])
+    with _lock:
+        _totals[key] += max(0.0, seconds - child_seconds)
+        _counts[key] += count
+    if stack:
+        stack[-1][2] += seconds
+
+
+class span:
+    """Context manager timing one phase, nested under the spans open in this thread."""
+
+    __slots__ = ('name', 'entry')
+    count = 1
+
+    def __init__(self, name):
+        self.name = name
+        self.entry = None
+
+    def __enter__(self):
+        if ENABLED:
+            self.entry = [self.name, time.perf_counter(), 0.0]
+            _stack().append(self.entry)
+        return self
+
+    def __exit__(self, *exc):
+        entry = self.entry
+        if entry is not None:
+            stack = _stack()
+            stack.pop()
+            _add(stack, entry[0], time.perf_counter() - entry[1], entry[2], self.count)
+            self.entry = None
+
+
+def record(name, seconds):
+    """Record a phase measured elsewhere (e.g. response.elapsed) under the open spans."""
+    if ENABLED:
+        _add(_stack(), name, seconds)
+
+
+def record_response(response, seconds, stream=False):
+    """Split a request's wall time into connect+first byte and body download."""
+    if not ENABLED:
+        return
+    first_byte = response.elapsed.total_seconds()
+    record('connect+first byte', first_byte)
+    if not stream:
+        record('body', seconds - first_byte)
+
+
+class call_span(span):
+    """Reopens the span of the API call that produced response (see client.api_get).
+
+    Phases after the request returns, such as decode, nest under the call
+    in the folded stacks without counting as another call.
+    """
+
+    __slots__ = ()
+    count = 0
+
+    def __init__(self, response):
+        super().__init__(getattr(response, 'api_name', 'request'))
+
+
+def timed_iter(iterable, name):
+    """Iterate, recording the time spent waiting for each item as phase `name`."""
+    if not ENABLED:
+        return iterable
+    return _timed_iter(iterable, name)
+
+
+def _timed_iter(iterable, name):
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            record(name, time.perf_counter() - start)
+        yield item
+
+
+def api_name(params):
+    """Short span name of an API call, e.g. 'SnapShot.TakeSnapshot'."""
+    api = str(params.get('api', '')).rsplit('.', 1)[-1] if params else ''
+    method = params.get('method', '') if params else ''
+    return f"{api}.{method}" if api else 'request'
+
+
+def span_totals():
+    """Return {folded stack: (count, self seconds)}."""
+    with _lock:
+        return {key: (_counts[key], _totals[key]) for key in _totals}
+
+
+def write_folded(path):
+    """Write the spans as folded stacks (microseconds), the input format of flamegraph.pl and speedscope."""
+    with open(path, 'w') as f:
+        for key, (count, seconds) in sorted(span_totals().items()):
+            f.write(f"{key} {int(seconds * 1e6)}\n")
+
+
+def format_report(profiler, memory, top=20):
+    """Top-N phases, functions and allocation sites of a profiled run."""
+    out = io.StringIO()
+
+    phases = defaultdict(lambda: [0, 0.0])
+    for key, (count, seconds) in span_totals().items():
+        phase = phases[key.rsplit(';', 1)[-1]]
+        phase[0] += count
+        phase[1] += seconds
+
+    out.write(f"Top {top} phases by wall time (self time, all threads)\n")
+    out.write(f"{'phase':40} {'count':>8} {'total s':>10} {'mean ms':>10}\n")
+    for name, (count, seconds) in sorted(phases.items(), key=lambda p: -p[1][1])[:top]:
+        out.write(f"{name:40} {count:8} {seconds:10.3f} {seconds / count * 1000:10.2f}\n")
+
+    out.write(f"\nTop {top} functions by cumulative time (main thread)\n")
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats('cumulative').print_stats(top)
+
+    current, peak = memory['traced']
+    out.write(f"Memory: {current / 1024 ** 2:.1f} MB traced at exit, {peak / 1024 ** 2:.1f} MB peak\n")
+    out.write(f"Top {top} allocation sites still held at exit\n")
+    for stat in memory['snapshot'].statistics('lineno')[:top]:
+        out.write(f"  {stat}\n")
+
+    return out.getvalue()
+
+
+def run_profiled(func, out_dir, top=20):
+    """Run func() with cProfile, tracemalloc and span recording, then write the reports.
+
+    Writes profile.pstats (for pstats/snakeviz), spans.folded (flame graph)
+    and report.txt (top-N) into out_dir and prints the report.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    reset()
+    enable()
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+
+    try:
+        profiler.runcall(func)
+    finally:
+        disable()
+        memory = {'traced': tracemalloc.get_traced_memory(), 'snapshot': tracemalloc.take_snapshot()}
+        tracemalloc.stop()
+
+        profiler.dump_stats(os.path.join(out_dir, 'profile.pstats'))
+        write_folded(os.path.join(out_dir, 'spans.folded'))
+        report = format_report(profiler, memory, top)
+        with open(os.path.join(out_dir, 'report.txt'), 'w') as f:
+            f.write(report)
+
+        print("\n" + report)
+        print(f"[INFO] Profile written to {out_dir}")
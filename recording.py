@@ -3,22 +3,37 @@ Recorrding module for Synology Surveillance Station.
 Handles List and Download operations.
 """
 
+import hashlib
+import os
 import requests
-from config import BASE_URL, CAMERA_API_PATH
+from config import CAMERA_API_PATH
+from client import api_get, get_default_client
+from decoding import decode_response
+from integrity import check_container
+from profiling import span, call_span, timed_iter
+from writers import buffered_writer
 
 
-def rec_list(sid):
+def rec_list(sid, nas=None, offset=0, limit=50, from_time=None, to_time=None, camera_ids=None):
+    """List recordings; from_time/to_time (epoch seconds) and camera_ids filter the listing."""
     params = {
         'api' : 'SYNO.SurveillanceStation.Recording',
         'method' : 'List',
         'version' : '6',
         '_sid' : sid,
-        'limit': 50
+        'offset': offset,
+        'limit': limit
     }
+    if from_time is not None:
+        params['fromTime'] = int(from_time)
+    if to_time is not None:
+        params['toTime'] = int(to_time)
+    if camera_ids:
+        params['cameraIds'] = ','.join(str(cam_id) for cam_id in camera_ids)
     try:
-        response = requests.get(f"{BASE_URL}{CAMERA_API_PATH}", params = params, timeout = 10, verify = False)
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = decode_response(response)
 
         if data.get('success'):
             recs = data["data"].get("recordings", [])
@@ -30,9 +45,48 @@ def rec_list(sid):
     except Exception as e:
         print(f"[ERROR] Recording list failed: {e}")
         return None
+
+
+def rec_list_all(sid, nas=None, page_size=500, **filters):
+    """List every recording matching the filters, page by page."""
+    recordings = []
+    while True:
+        page = rec_list(sid, nas=nas, offset=len(recordings), limit=page_size, **filters)
+        if page is None:
+            return None
+        recordings.extend(page)
+        if len(page) < page_size:
+            return recordings
+    
+def rec_download(sid, rec_id, file_name, nas=None, store=None, meta=None, manifest=None, retries=3,
+                 writer=None, offset_ms=None, play_ms=None):
+    """Download a recording by ID with progress bar.
+    
+    The sha256 is computed while the chunks are written to file_name + '.part'.
+    The transfer must match Content-Length and pass a container check before
+    it is renamed to file_name; an interrupted transfer resumes from the last
+    byte received, also in a later run.
+    With a ContentStore, recordings already fetched (same size/mtime in meta)
+    are linked from the store instead of downloaded again. With a
+    VerifyManifest, verified files are recorded and skipped on later runs.
+    writer(path, append) opens the output file; see writers.export_writer() for
+    preallocated, aligned writes that keep exports out of the page cache.
+    offset_ms/play_ms ask the server for only part of the recording.
+    """
+    meta = meta or {}
+    nas_id = (nas or get_default_client()).name
+    
+    if store:
+        digest = store.lookup(nas_id, 'recording', rec_id, meta.get('size'), meta.get('mtime'))
+        if digest:
+            store.export(digest, file_name)
+            print(f"[INFO] Recording {rec_id} already downloaded: {file_name}")
+            return file_name
+    
+    if manifest and manifest.is_verified(file_name, rec_id):
+        print(f"[INFO] Recording {rec_id} already verified: {file_name}")
+        return file_name
     
-def rec_download(sid, rec_id, file_name):
-    """Download a recording by ID with progress bar."""
     params = {
         'api': 'SYNO.SurveillanceStation.Recording',
         'method': 'Download',
@@ -40,54 +94,151 @@ def rec_download(sid, rec_id, file_name):
         '_sid': sid,
         'id': rec_id
     }
+    if offset_ms is not None:
+        params['offsetTimeMs'] = int(offset_ms)
+    if play_ms is not None:
+        params['playTimeMs'] = int(play_ms)
+    api_path = f"{CAMERA_API_PATH}/{os.path.basename(file_name)}"
+    
+    part_name = file_name + '.part'
+    hasher = hashlib.sha256()
+    # A transfer cut short in an earlier run is resumed, not fetched again
+    downloaded = _hash_file(part_name, hasher) if os.path.exists(part_name) else 0
+    total_size = 0
+    complete = False
+    f = None
     
     try:
-        response = requests.get(f"{BASE_URL}{CAMERA_API_PATH}/{file_name}", params=params, timeout=120, verify=False, stream=True)
-        response.raise_for_status()
-        
-        content_type = response.headers.get('Content-Type', '')
-        
-        if 'video' in content_type or 'octet-stream' in content_type:
-            total_size = int(response.headers.get('Content-Length', 0))
-            
-            print(f"\n[INFO] Downloading recording {rec_id}...")
-            if total_size > 0:
-                print(f"[INFO] File size: {total_size / (1024 * 1024):.2f} MB")
-            
-            with open(file_name, 'wb') as f:
-                downloaded = 0
-                # 512 KB = 524288 bytes (ottimo per file 100-200MB)
-                # 1 MB = 1048576 bytes (ottimo per file >200MB)
-                chunk_size = 1024 * 1024  # 1 MB
+        try:
+            for attempt in range(retries + 1):
+                # Resume after an interrupted transfer instead of starting over
+                headers = {'Range': f"bytes={downloaded}-"} if downloaded else {}
                 
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
+                try:
+                    response = api_get(api_path, params, nas=nas, timeout=120, stream=True, headers=headers)
+                    response.raise_for_status()
+                    
+                    content_type = response.headers.get('Content-Type', '')
+                    
+                    if not ('video' in content_type or 'octet-stream' in content_type):
+                        _print_download_error(response, content_type)
+                        return None
+                    
+                    if f is None:
+                        # Opened only once the NAS sends video, so an API error leaves no empty file
+                        f = (writer or buffered_writer)(part_name, append=bool(downloaded))
+                    
+                    if downloaded and response.status_code != 206:
+                        # Range not honoured: the body starts from byte 0 again
+                        f.seek(0)
+                        f.truncate()
+                        hasher = hashlib.sha256()
+                        downloaded = 0
+                    
+                    if not total_size:
+                        total_size = downloaded + int(response.headers.get('Content-Length', 0))
+                        print(f"\n[INFO] Downloading recording {rec_id}...")
                         if total_size > 0:
-                            percent = (downloaded / total_size) * 100
-                            bar_length = 40
-                            filled = int(bar_length * downloaded / total_size)
-                            bar = '█' * filled + '-' * (bar_length - filled)
-                            print(f"\r[{bar}] {percent:.1f}%", end='', flush=True)
-                        else:
-                            print(f"\rDownloaded: {downloaded / (1024 * 1024):.2f} MB", 
-                                  end='', flush=True)
-            
-            print(f"\n[SUCCESS] Recording saved: {file_name}")
-            return file_name
+                            print(f"[INFO] File size: {total_size / (1024 * 1024):.2f} MB")
+                            if hasattr(f, 'preallocate'):
+                                f.preallocate(total_size)
+                    
+                    with call_span(response):
+                        downloaded = _write_chunks(response, f, hasher, downloaded, total_size)
+                    complete = not total_size or downloaded >= total_size
+                    
+                except requests.RequestException as e:
+                    # Every chunk written was also hashed, so resume from the file position
+                    if f is not None:
+                        downloaded = f.tell()
+                    print(f"\n[ERROR] Transfer interrupted: {e}")
+                
+                if complete:
+                    break
+                if attempt < retries:
+                    print(f"\n[INFO] Resuming recording {rec_id} at byte {downloaded}")
+        finally:
+            if f is not None:
+                f.close()
         
-        else:
-            try:
-                data = response.json()
-                errno = data.get('error', {}).get('code', 'unknown')
-                print(f"[ERROR] Recording download failed with API code: {errno}")
-            except:
-                print(f"[ERROR] Unknown response type: {content_type}")
-            
+        if not complete:
+            # The partial file is kept so the next run fetches only the rest
+            print(f"\n[ERROR] Recording {rec_id} truncated: "
+                  f"{downloaded} of {total_size or 'unknown'} bytes")
             return None
+        
+        if total_size and downloaded != total_size:
+            print(f"\n[ERROR] Recording {rec_id} has {downloaded} bytes, expected {total_size}")
+            os.remove(part_name)
+            return None
+        
+        ok, reason = check_container(part_name)
+        if not ok:
+            print(f"\n[ERROR] Recording {rec_id} failed verification: {reason}")
+            os.remove(part_name)
+            return None
+        
+        # Renaming over file_name, never writing through it, leaves any store
+        # object an earlier export was linked to untouched
+        os.replace(part_name, file_name)
+        
+        digest = hasher.hexdigest()
+        if manifest:
+            manifest.record(file_name, rec_id, downloaded, digest)
+        if store:
+            store.add_file(file_name, nas_id, 'recording', rec_id,
+                           meta.get('size'), meta.get('mtime'), digest=digest)
+        
+        print(f"\n[SUCCESS] Recording saved: {file_name} (sha256 {digest[:12]})")
+        return file_name
             
     except Exception as e:
         print(f"[ERROR] Recording download failed: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def _hash_file(path, hasher, chunk_size=1024 * 1024):
+    """Feed a file into hasher; returns its size."""
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+            size += len(chunk)
+    return size
+
+
+def _write_chunks(response, f, hasher, downloaded, total_size):
+    """Write and hash the response body, printing progress; returns bytes downloaded."""
+    # 512 KB = 524288 bytes (ottimo per file 100-200MB)
+    # 1 MB = 1048576 bytes (ottimo per file >200MB)
+    chunk_size = 1024 * 1024  # 1 MB
+    
+    for chunk in timed_iter(response.iter_content(chunk_size=chunk_size), 'body'):
+        if chunk:
+            with span('write'):
+                f.write(chunk)
+            with span('hash'):
+                hasher.update(chunk)
+            downloaded += len(chunk)
+            
+            if total_size > 0:
+                percent = (downloaded / total_size) * 100
+                bar_length = 40
+                filled = int(bar_length * downloaded / total_size)
+                bar = '█' * filled + '-' * (bar_length - filled)
+                print(f"\r[{bar}] {percent:.1f}%", end='', flush=True)
+            else:
+                print(f"\rDownloaded: {downloaded / (1024 * 1024):.2f} MB", 
+                      end='', flush=True)
+    
+    return downloaded
+
+
+def _print_download_error(response, content_type):
+    """Print the API error carried by a non-video download response."""
+    try:
+        data = decode_response(response)
+        errno = data.get('error', {}).get('code', 'unknown')
+        print(f"[ERROR] Recording download failed with API code: {errno}")
+    except:
+        print(f"[ERROR] Unknown response type: {content_type}")
@@ -3,15 +3,17 @@ Snapshot management module for Synology Surveillance Station.
 Handles snapshot capture, save, download, and display operations.
 """
 
-from config import BASE_URL, CAMERA_API_PATH
-import requests
+from config import CAMERA_API_PATH
+from client import api_get, api_post, get_default_client
+from decoding import decode_response, decode_snapshot_response
+from profiling import span
 import base64
 from PIL import Image
 import io
 import json
 
 
-def take_snapshot(sid, camId, dsId):
+def take_snapshot(sid, camId, dsId, nas=None):
     """Capture a snapshot from the camera without saving to database."""
     params = {
         'api': 'SYNO.SurveillanceStation.SnapShot',
@@ -24,13 +26,9 @@ def take_snapshot(sid, camId, dsId):
     }
     
     try:
-        response = requests.get(
-            f"{BASE_URL}{CAMERA_API_PATH}", 
-            params=params, 
-            timeout=10, 
-            verify=False)
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = decode_snapshot_response(response)
         
         if not data.get('success'):
             errno = data.get('error', {}).get('code')
@@ -45,7 +43,7 @@ def take_snapshot(sid, camId, dsId):
         return None
 
 
-def save_snapshot(sid, snapData):
+def save_snapshot(sid, snapData, nas=None):
     """Save a captured snapshot to Synology database."""
     params = {
         'api': 'SYNO.SurveillanceStation.SnapShot',
@@ -63,15 +61,14 @@ def save_snapshot(sid, snapData):
         'imageData': snapData.get('imageData', '')
     }
     
+    # take_snapshot() returns imageData as a memoryview over the response body
+    if isinstance(data['imageData'], memoryview):
+        data['imageData'] = data['imageData'].tobytes()
+    
     try:
-        response = requests.post(
-            f"{BASE_URL}{CAMERA_API_PATH}", 
-            params=params, 
-            data=data, 
-            timeout=30, 
-            verify=False)
+        response = api_post(CAMERA_API_PATH, params, data=data, nas=nas, timeout=30)
         response.raise_for_status()
-        result = response.json()
+        result = decode_response(response)
         
         if not result.get('success'):
             errno = result.get('error', {}).get('code')
@@ -86,7 +83,7 @@ def save_snapshot(sid, snapData):
         return None
 
 
-def get_snapshot_list(sid, camId):
+def get_snapshot_list(sid, camId, nas=None):
     """Get list of saved snapshots for a specific camera."""
     params = {
         'api': 'SYNO.SurveillanceStation.SnapShot',
@@ -103,9 +100,9 @@ def get_snapshot_list(sid, camId):
     }
     
     try:
-        response = requests.get(f"{BASE_URL}{CAMERA_API_PATH}", params=params, timeout=10, verify=False)
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = decode_response(response)
         
         if not data.get('success'):
             errno = data.get('error', {}).get('code')
@@ -123,8 +120,8 @@ def get_snapshot_list(sid, camId):
         return None
 
 
-def download_snapshot(sid, snap_id, save_path):
-    """Download a saved snapshot by ID to local file."""
+def fetch_snapshot(sid, snap_id, nas=None):
+    """Fetch a saved snapshot by ID and return the JPEG bytes."""
     params = {
         'api': 'SYNO.SurveillanceStation.SnapShot',
         'method': 'Download',
@@ -134,25 +131,16 @@ def download_snapshot(sid, snap_id, save_path):
     }
     
     try:
-        response = requests.get(
-            f"{BASE_URL}{CAMERA_API_PATH}", 
-            params=params, 
-            timeout=30, 
-            verify=False)
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=30)
         response.raise_for_status()
         
         content_type = response.headers.get('Content-Type', '')
         
         if 'image' in content_type or len(response.content) > 1000:
-            with open(save_path, 'wb') as f:
-                f.write(response.content)
-            
-            print(f"[SUCCESS] Image downloaded: {save_path} "
-                  f"({len(response.content)} bytes)")
-            return save_path
+            return response.content
         else:
             try:
-                data = response.json()
+                data = decode_response(response)
                 errno = data.get('error', {}).get('code')
                 print(f"[ERROR] Snapshot download failed "
                       f"with API code: {errno}")
@@ -166,11 +154,50 @@ def download_snapshot(sid, snap_id, save_path):
         return None
 
 
+def download_snapshot(sid, snap_id, save_path, nas=None, store=None, meta=None):
+    """Download a saved snapshot by ID to local file.
+    
+    With a ContentStore, snapshots already fetched (same size/mtime in meta)
+    are linked from the store instead of downloaded again.
+    """
+    meta = meta or {}
+    nas_id = (nas or get_default_client()).name
+    
+    if store:
+        digest = store.lookup(nas_id, 'snapshot', snap_id, meta.get('size'), meta.get('mtime'))
+        if digest:
+            store.export(digest, save_path)
+            print(f"[INFO] Snapshot {snap_id} already downloaded: {save_path}")
+            return save_path
+    
+    content = fetch_snapshot(sid, snap_id, nas=nas)
+    
+    if content is None:
+        return None
+    
+    try:
+        if store:
+            store.add_bytes(content, save_path, nas_id, 'snapshot', snap_id,
+                            meta.get('size'), meta.get('mtime'))
+        else:
+            with span('write'), open(save_path, 'wb') as f:
+                f.write(content)
+        
+        print(f"[SUCCESS] Image downloaded: {save_path} "
+              f"({len(content)} bytes)")
+        return save_path
+        
+    except Exception as e:
+        print(f"[ERROR] Snapshot download failed: {e}")
+        return None
+
+
 def show_snapshot(snapData):
     """Decode and display snapshot image from base64 data."""
     try:
         image_base64 = snapData['imageData']
-        image_bytes = base64.b64decode(image_base64)
+        with span('base64'):
+            image_bytes = base64.b64decode(image_base64)
         image = Image.open(io.BytesIO(image_bytes))
         
         print("\nSnapshot Preview:")
@@ -179,13 +206,14 @@ def show_snapshot(snapData):
               f"x{snapData.get('height', 0)}")
         print(f"  Size:       {snapData.get('byteSize', 0)} bytes")
         
-        image.show()
+        with span('display'):
+            image.show()
         
     except Exception as e:
         print(f"[ERROR] Failed to display snapshot: {e}")
 
 
-def delete_snapshots(sid, id_list):
+def delete_snapshots(sid, id_list, nas=None):
     """Delete snapshots by ID list"""
     
     # Costruisci l'array di oggetti
@@ -200,14 +228,9 @@ def delete_snapshots(sid, id_list):
     }
     
     try:
-        response = requests.get(
-            f"{BASE_URL}{CAMERA_API_PATH}",
-            params=params,
-            timeout=10,
-            verify=False
-        )
+        response = api_get(CAMERA_API_PATH, params, nas=nas, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = decode_response(response)
         
         if not data.get('success'):
             errno = data.get('error', {}).get('code')
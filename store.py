@@ -0,0 +1,177 @@
+"""
+Content store module for Synology Surveillance Station.
+Keeps downloaded snapshots and recordings content-addressed so repeated exports skip known data.
+"""
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import threading
+from snapshot import get_snapshot_list, download_snapshot
+from recording import rec_list_all, rec_download
+
+
+class ContentStore:
+    """Local content-addressed store of downloaded files.
+
+    Objects live under <root>/objects/<sha256[:2]>/<sha256>, and exported files
+    are hardlinks to them. index.jsonl maps "<nas>:<kind>:<id>" to the size,
+    mtime and sha256 seen when the item was fetched.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.index_path = os.path.join(root, 'index.jsonl')
+        self.index = {}
+        self.lock = threading.Lock()
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.index[entry['key']] = entry
+
+    @staticmethod
+    def make_key(nas_id, kind, item_id):
+        return f"{nas_id}:{kind}:{item_id}"
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def lookup(self, nas_id, kind, item_id, size=None, mtime=None):
+        """Return the sha256 of a stored item, or None if it must be fetched.
+
+        size and mtime, when given, must match the values recorded at fetch
+        time, so an item changed on the NAS is fetched again.
+        """
+        entry = self.index.get(self.make_key(nas_id, kind, item_id))
+        if not entry:
+            return None
+        if size is not None and entry.get('size') not in (None, size):
+            return None
+        if mtime is not None and entry.get('mtime') not in (None, mtime):
+            return None
+        if not os.path.exists(self.object_path(entry['sha256'])):
+            return None
+        return entry['sha256']
+
+    def add_file(self, path, nas_id, kind, item_id, size=None, mtime=None, digest=None):
+        """Move a downloaded file into the store and hardlink it back in place."""
+        if digest is None:
+            digest = file_sha256(path)
+
+        obj_path = self.object_path(digest)
+        with self.lock:
+            os.makedirs(os.path.dirname(obj_path), exist_ok=True)
+            if os.path.exists(obj_path):
+                os.remove(path)
+            else:
+                _move_file(path, obj_path)
+            self._record(nas_id, kind, item_id, size, mtime, digest)
+        link_file(obj_path, path)
+        return digest
+
+    def add_bytes(self, content, path, nas_id, kind, item_id, size=None, mtime=None):
+        """Store in-memory content and hardlink it to path (if not None)."""
+        digest = hashlib.sha256(content).hexdigest()
+        obj_path = self.object_path(digest)
+        with self.lock:
+            if not os.path.exists(obj_path):
+                os.makedirs(os.path.dirname(obj_path), exist_ok=True)
+                tmp_path = obj_path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, obj_path)
+            self._record(nas_id, kind, item_id, size, mtime, digest)
+        if path is not None:
+            link_file(obj_path, path)
+        return digest
+
+    def export(self, digest, path):
+        """Place a stored object at path; returns False if it was already there."""
+        return link_file(self.object_path(digest), path)
+
+    def _record(self, nas_id, kind, item_id, size, mtime, digest):
+        entry = {
+            'key': self.make_key(nas_id, kind, item_id),
+            'size': size,
+            'mtime': mtime,
+            'sha256': digest
+        }
+        self.index[entry['key']] = entry
+        with open(self.index_path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Compute the sha256 hex digest of a file in chunks."""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _move_file(src, dest):
+    """Rename src to dest, copying through dest + '.tmp' across file systems."""
+    try:
+        os.replace(src, dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        tmp_path = dest + '.tmp'
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dest)
+        os.remove(src)
+
+
+def link_file(src, dest):
+    """Hardlink src to dest, copying across file systems; skip if already linked."""
+    if os.path.exists(dest):
+        if os.path.samefile(src, dest):
+            return False
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+    return True
+
+
+def sync_snapshots(sid, cam_id, store, dest_dir, nas=None, skip=()):
+    """Export all saved snapshots of a camera, fetching only ones not yet stored.
+
+    Snapshot IDs in skip (e.g. near-duplicates from dedup.find_duplicates)
+    are not exported.
+    """
+    snapshots = get_snapshot_list(sid, cam_id, nas=nas) or []
+    os.makedirs(dest_dir, exist_ok=True)
+
+    exported = 0
+    for snap in snapshots:
+        if snap['id'] in skip:
+            continue
+        meta = {'size': snap.get('byteSize'), 'mtime': snap.get('createdTm')}
+        path = os.path.join(dest_dir, f"{snap['id']}.jpg")
+        if download_snapshot(sid, snap['id'], path, nas=nas, store=store, meta=meta):
+            exported += 1
+    return exported
+
+
+def sync_recordings(sid, store, dest_dir, nas=None, writer=None):
+    """Export all recordings, fetching only ones not yet stored."""
+    recordings = rec_list_all(sid, nas=nas) or []
+    os.makedirs(dest_dir, exist_ok=True)
+
+    exported = 0
+    for rec in recordings:
+        meta = {'size': rec.get('sizeByte'), 'mtime': rec.get('stopTime')}
+        path = os.path.join(dest_dir, f"{rec['id']}.mp4")
+        if rec_download(sid, rec['id'], path, nas=nas, store=store, meta=meta, writer=writer):
+            exported += 1
+    return exported
@@ -0,0 +1,45 @@
+"""
+Tests for the snapshot response decoding.
+"""
+
+from decoding import split_image_data, decode_snapshot_response
+
+
+def test_split_image_data():
+    stripped, image_data = split_image_data(b'{"data":{"imageData":"QUJDRA==","width":1}}')
+    assert stripped == b'{"data":{"imageData":"","width":1}}'
+    assert bytes(image_data) == b'QUJDRA=='
+
+
+def test_split_image_data_unescapes_slashes():
+    stripped, image_data = split_image_data(b'{"data":{"imageData":"QUJD\\/RA=="}}')
+    assert stripped == b'{"data":{"imageData":""}}'
+    assert bytes(image_data) == b'QUJD/RA=='
+
+
+def test_split_image_data_without_image():
+    raw = b'{"success":false}'
+    assert split_image_data(raw) == (raw, None)
+
+
+def test_split_image_data_falls_back_without_string_value():
+    for raw in (b'{"data":{"imageData":null,"width":1}}',
+                b'{"note":{"imageData":1},"data":{"imageData":"QUJDRA=="}}'):
+        assert split_image_data(raw) == (raw, None)
+
+
+def test_split_image_data_allows_whitespace():
+    stripped, image_data = split_image_data(b'{"data":{"imageData" : "QUJDRA=="}}')
+    assert stripped == b'{"data":{"imageData" : ""}}'
+    assert bytes(image_data) == b'QUJDRA=='
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+
+
+def test_decode_snapshot_response_after_full_parse():
+    data = decode_snapshot_response(_Response(b'{"key":"imageData","data":{"imageData":"QUJDRA=="}}'))
+    assert bytes(data['data']['imageData']) == b'QUJDRA=='
+    assert decode_snapshot_response(_Response(b'{"data":{"imageData":null}}'))['data']['imageData'] is None
@@ -0,0 +1,282 @@
+"""
+Time-lapse module for Synology Surveillance Station.
+Streams snapshots one frame at a time into a video or MJPEG file, with resume support.
+"""
+
+import argparse
+import base64
+import json
+import os
+import shutil
+import subprocess
+import time
+from auth import login, logout
+from snapshot import take_snapshot, get_snapshot_list, fetch_snapshot
+
+
+class MJPEGWriter:
+    """Append JPEG frames to a Motion-JPEG file.
+
+    When resuming, size is the file length recorded with the last saved
+    state; anything beyond it is a frame written before a crash and is cut
+    off, so it is not written twice.
+    """
+
+    def __init__(self, path, size=None):
+        self.path = path
+        self.file = open(path, 'ab')
+        if size is not None and self.file.tell() > size:
+            self.file.truncate(size)
+
+    def write(self, jpeg_bytes):
+        self.file.write(jpeg_bytes)
+        self.file.flush()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class FFmpegWriter:
+    """Pipe JPEG frames into ffmpeg, which encodes them without buffering.
+
+    Each run writes a new numbered segment next to the output path, so an
+    interrupted time-lapse resumes into the following segment; join_segments()
+    concatenates them into the output once the time-lapse is complete.
+    """
+
+    def __init__(self, path, fps=25, segment=0, codec='libx264', crf=23):
+        if not shutil.which('ffmpeg'):
+            raise RuntimeError("ffmpeg not found in PATH")
+
+        self.path = segment_path(path, segment)
+        self.process = subprocess.Popen(
+            ['ffmpeg', '-loglevel', 'error', '-y',
+             '-f', 'image2pipe', '-c:v', 'mjpeg', '-framerate', str(fps), '-i', '-',
+             '-c:v', codec, '-crf', str(crf), '-pix_fmt', 'yuv420p', self.path],
+            stdin=subprocess.PIPE)
+
+    def write(self, jpeg_bytes):
+        self.process.stdin.write(jpeg_bytes)
+
+    def tell(self):
+        # Segments are never appended to, so there is nothing to cut on resume
+        return None
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+
+def segment_path(path, segment):
+    """Path of an FFmpegWriter segment of the output path."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.part{segment:03d}{ext or '.mp4'}"
+
+
+def join_segments(path, segments):
+    """Concatenate the written segments onto the output with ffmpeg's concat demuxer.
+
+    An existing output (from an earlier completed run) is kept as the first
+    part. The segments are removed once joined; returns False on failure.
+    """
+    segment_paths = [p for p in (segment_path(path, n) for n in range(segments)) if os.path.exists(p)]
+    # A run that wrote no frame leaves an empty segment
+    parts = [p for p in segment_paths if os.path.getsize(p) > 0]
+    if not parts:
+        for segment in segment_paths:
+            os.remove(segment)
+        return True
+    if os.path.exists(path):
+        parts.insert(0, path)
+
+    root, ext = os.path.splitext(path)
+    list_path = root + '.concat.txt'
+    tmp_path = f"{root}.joining{ext or '.mp4'}"
+    with open(list_path, 'w') as f:
+        for part in parts:
+            escaped = os.path.abspath(part).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    try:
+        result = subprocess.run(['ffmpeg', '-loglevel', 'error', '-y', '-f', 'concat', '-safe', '0',
+                                 '-i', list_path, '-c', 'copy', tmp_path])
+        if result.returncode != 0:
+            print(f"[ERROR] Joining segments failed, they are kept next to {path}")
+            return False
+        os.replace(tmp_path, path)
+        for segment in segment_paths:
+            os.remove(segment)
+        return True
+    finally:
+        os.remove(list_path)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class TimelapseState:
+    """Resume journal of a time-lapse, stored as JSON next to the output file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.frames = 0
+        self.segments = 0
+        self.last_time = 0
+        self.last_id = None
+        self.output_size = None
+        self.next_capture = 0
+        self.end_time = 0
+
+        if os.path.exists(path):
+            with open(path) as f:
+                self.__dict__.update(json.load(f))
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'frames': self.frames,
+                'segments': self.segments,
+                'last_time': self.last_time,
+                'last_id': self.last_id,
+                'output_size': self.output_size,
+                'next_capture': self.next_capture,
+                'end_time': self.end_time
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+def open_writer(output, state, fmt='mjpeg', fps=25):
+    """Open the frame writer for the output, continuing after the last segment."""
+    if fmt == 'mjpeg':
+        return MJPEGWriter(output, size=state.output_size)
+
+    writer = FFmpegWriter(output, fps=fps, segment=state.segments)
+    state.segments += 1
+    state.save()
+    return writer
+
+
+def capture_timelapse(sid, cam_id, ds_id, writer, state, interval=10, duration=86400, nas=None):
+    """Capture a frame every interval seconds until duration has elapsed.
+
+    The schedule is anchored to wall-clock time in the state journal, so a
+    restarted run continues where it stopped instead of starting over.
+    """
+    if interval <= 0:
+        raise ValueError(f"Capture interval must be positive: {interval!r}")
+
+    if not state.end_time:
+        state.next_capture = time.time()
+        state.end_time = state.next_capture + duration
+
+    while state.next_capture < state.end_time:
+        delay = state.next_capture - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+        snap = take_snapshot(sid, cam_id, ds_id, nas=nas)
+        if snap:
+            writer.write(base64.b64decode(snap['imageData']))
+            state.frames += 1
+            state.last_time = int(time.time())
+            state.output_size = writer.tell()
+
+        # Skip intervals missed while the process was down instead of bursting
+        state.next_capture += interval
+        if state.next_capture < time.time():
+            missed = int((time.time() - state.next_capture) // interval) + 1
+            state.next_capture += missed * interval
+        state.save()
+
+    print(f"[SUCCESS] Time-lapse complete: {state.frames} frames")
+    return state.frames
+
+
+def build_from_saved(sid, cam_id, writer, state, nas=None, retries=2):
+    """Stream the camera's saved snapshots into the writer, oldest first.
+
+    Progress is kept as the (createdTm, id) of the last written snapshot,
+    so snapshots taken in the same second are not skipped on resume. A
+    snapshot that cannot be fetched stops the build, so no frame is left
+    out; returns None then, and a rerun resumes from it.
+    """
+    snapshots = get_snapshot_list(sid, cam_id, nas=nas)
+    if not snapshots:
+        return 0
+
+    def key(snap):
+        return snap.get('createdTm', 0), snap['id']
+
+    if state.last_id is None:
+        # State written before IDs were recorded
+        done = lambda snap: snap.get('createdTm', 0) <= state.last_time
+    else:
+        done = lambda snap: key(snap) <= (state.last_time, state.last_id)
+    pending = sorted((snap for snap in snapshots if not done(snap)), key=key)
+
+    for snap in pending:
+        for attempt in range(retries + 1):
+            content = fetch_snapshot(sid, snap['id'], nas=nas)
+            if content is not None:
+                break
+        if content is None:
+            print(f"[ERROR] Snapshot {snap['id']} could not be fetched after {state.frames} frames, "
+                  "rerun to resume")
+            return None
+
+        writer.write(content)
+        state.frames += 1
+        state.last_time, state.last_id = key(snap)
+        state.output_size = writer.tell()
+        state.save()
+
+    print(f"[SUCCESS] Time-lapse complete: {state.frames} frames")
+    return state.frames
+
+
+def main():
+    """Command-line entry point for building a time-lapse of one camera."""
+    parser = argparse.ArgumentParser(description="Build a time-lapse from a Surveillance Station camera.")
+    parser.add_argument('--camera', type=int, required=True, help="camera ID")
+    parser.add_argument('--ds', type=int, default=0, help="dsId of the camera")
+    parser.add_argument('--output', required=True, help="output file (.mjpeg or video)")
+    parser.add_argument('--format', choices=['mjpeg', 'ffmpeg'], default='mjpeg',
+                        help="ffmpeg writes one <output>.partNNN segment per run and joins them "
+                             "into the output when the time-lapse is complete")
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--interval', type=float, default=10, help="seconds between captures")
+    parser.add_argument('--duration', type=float, default=86400, help="seconds to capture")
+    parser.add_argument('--saved', action='store_true', help="use saved snapshots instead of capturing")
+    args = parser.parse_args()
+    if args.interval <= 0:
+        parser.error("--interval must be positive")
+
+    sid = login()
+    if not sid:
+        return
+
+    state = TimelapseState(args.output + '.state.json')
+    writer = open_writer(args.output, state, fmt=args.format, fps=args.fps)
+    complete = False
+    try:
+        if args.saved:
+            complete = build_from_saved(sid, args.camera, writer, state) is not None
+        else:
+            capture_timelapse(sid, args.camera, args.ds, writer, state,
+                              interval=args.interval, duration=args.duration)
+            complete = True
+    except KeyboardInterrupt:
+        print(f"\n[INFO] Interrupted after {state.frames} frames, rerun to resume")
+    finally:
+        writer.close()
+        logout(sid)
+
+    if complete and args.format == 'ffmpeg' and join_segments(args.output, state.segments):
+        print(f"[SUCCESS] Time-lapse written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
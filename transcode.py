@@ -0,0 +1,161 @@
+"""
+Transcode module for Synology Surveillance Station.
+Re-encodes archived snapshots at a smaller size and quality on a process pool.
+"""
+
+import argparse
+import datetime
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from PIL import Image
+from auth import login, logout
+from snapshot import get_snapshot_list
+
+
+FORMATS = {'jpeg': '.jpg', 'webp': '.webp'}
+
+# EXIF tags
+TAG_MAKE = 0x010F
+TAG_MODEL = 0x0110
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 0x9003
+
+
+def _exif_for(image, meta):
+    """Source EXIF plus camera name and capture time from the snapshot list."""
+    exif = image.getexif()
+    if meta.get('camera'):
+        exif[TAG_MAKE] = 'Synology Surveillance Station'
+        exif[TAG_MODEL] = str(meta['camera'])
+    if meta.get('time'):
+        stamp = datetime.datetime.fromtimestamp(meta['time']).strftime('%Y:%m:%d %H:%M:%S')
+        exif[TAG_DATETIME] = stamp
+        exif.get_ifd(TAG_EXIF_IFD)[TAG_DATETIME_ORIGINAL] = stamp
+    return exif
+
+
+def transcode_image(src, dest, max_size=(1280, 720), quality=75, fmt='jpeg', meta=None):
+    """Re-encode one image file; runs in a worker process.
+
+    The image is scaled to fit max_size (never enlarged). JPEG output is
+    progressive and Huffman-optimized. EXIF is kept and camera/time from
+    meta are added; the file modification time is set to the capture time.
+    Returns (src, dest, source bytes, output bytes).
+    """
+    meta = meta or {}
+    with Image.open(src) as image:
+        # Let the JPEG decoder do most of the downscaling
+        image.draft('RGB', max_size)
+        exif = _exif_for(image, meta)
+        image = image.convert('RGB')
+        image.thumbnail(max_size, Image.LANCZOS)
+
+        tmp_path = dest + '.tmp'
+        if fmt == 'webp':
+            image.save(tmp_path, format='WEBP', quality=quality, method=4, exif=exif.tobytes())
+        else:
+            image.save(tmp_path, format='JPEG', quality=quality, optimize=True,
+                       progressive=True, exif=exif.tobytes())
+    os.replace(tmp_path, dest)
+
+    mtime = meta.get('time') or os.path.getmtime(src)
+    os.utime(dest, (mtime, mtime))
+    return src, dest, os.path.getsize(src), os.path.getsize(dest)
+
+
+def transcode_files(jobs, workers=None, max_in_flight=None, **options):
+    """Transcode (src, dest, meta) jobs on a process pool, yielding results as they finish.
+
+    At most max_in_flight images (default 2 per worker) are queued at once,
+    so a large job list is never loaded into the pool in one go. Yields
+    (src, dest, source bytes, output bytes), or (src, dest, None, error)
+    for images that failed.
+    """
+    workers = workers or os.cpu_count() or 4
+    max_in_flight = max_in_flight or workers * 2
+    jobs = iter(jobs)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        while True:
+            for src, dest, meta in jobs:
+                future = pool.submit(transcode_image, src, dest, meta=meta, **options)
+                pending[future] = (src, dest)
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                src, dest = pending.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    yield src, dest, None, e
+
+
+def snapshot_metadata(sid, cam_id, nas=None):
+    """Map '<snapshot ID>' file stems to {'camera', 'time'} from the NAS snapshot list."""
+    snapshots = get_snapshot_list(sid, cam_id, nas=nas) or []
+    return {str(s['id']): {'camera': s.get('camName'), 'time': s.get('createdTm')} for s in snapshots}
+
+
+def transcode_dir(src_dir, dest_dir, metadata=None, fmt='jpeg', **options):
+    """Transcode every JPEG in src_dir into dest_dir; returns (count, source bytes, output bytes)."""
+    os.makedirs(dest_dir, exist_ok=True)
+    metadata = metadata or {}
+
+    def jobs():
+        for name in sorted(os.listdir(src_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in ('.jpg', '.jpeg'):
+                continue
+            dest = os.path.join(dest_dir, stem + FORMATS[fmt])
+            yield os.path.join(src_dir, name), dest, metadata.get(stem)
+
+    count = before = after = 0
+    for src, dest, src_size, result in transcode_files(jobs(), fmt=fmt, **options):
+        if src_size is None:
+            print(f"[ERROR] Transcoding {src} failed: {result}")
+            continue
+        count += 1
+        before += src_size
+        after += result
+        print(f"[INFO] {os.path.basename(src)}: {src_size // 1024} KB -> {result // 1024} KB")
+    return count, before, after
+
+
+def main():
+    """Re-encode a directory of downloaded snapshots for archiving."""
+    parser = argparse.ArgumentParser(description="Re-encode archived snapshots.")
+    parser.add_argument('src', help="directory of downloaded snapshots")
+    parser.add_argument('dest', help="output directory")
+    parser.add_argument('--size', default='1280x720', help="maximum size WxH")
+    parser.add_argument('--quality', type=int, default=75)
+    parser.add_argument('--format', choices=sorted(FORMATS), default='jpeg')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help="encoder processes")
+    parser.add_argument('--camera', type=int, help="read camera name/time metadata from this camera's snapshot list")
+    args = parser.parse_args()
+
+    metadata = {}
+    if args.camera is not None:
+        sid = login()
+        if not sid:
+            return
+        try:
+            metadata = snapshot_metadata(sid, args.camera)
+        finally:
+            logout(sid)
+
+    max_size = tuple(int(v) for v in args.size.lower().split('x'))
+    count, before, after = transcode_dir(args.src, args.dest, metadata, fmt=args.format,
+                                         workers=args.workers, max_size=max_size, quality=args.quality)
+    if count:
+        print(f"[SUCCESS] {count} snapshot(s) re-encoded: {before / (1024 * 1024):.1f} MB -> "
+              f"{after / (1024 * 1024):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
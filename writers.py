@@ -0,0 +1,163 @@
+"""
+Export writer module for Synology Surveillance Station.
+Disk-aware output files for large recording exports.
+"""
+
+import mmap
+import os
+
+
+ALIGNMENT = 4096
+
+
+class ExportWriter:
+    """Write-only file for large exports.
+
+    - preallocate() reserves the expected size up front so concurrent
+      exports do not fragment the file system;
+    - data is written in large blocks that are multiples of ALIGNMENT, from a
+      page-aligned buffer, optionally with O_DIRECT to bypass the page cache;
+    - every fsync_every bytes the written range is fsynced and dropped from
+      the page cache with posix_fadvise, so exports do not push other
+      processes out of memory.
+    Use it through rec_download(writer=...), e.g. writer=export_writer(direct=True).
+    With append=True writing continues at the end of an existing file.
+    """
+
+    def __init__(self, path, block_size=8 * 1024 * 1024, direct=False,
+                 fsync_every=64 * 1024 * 1024, drop_cache=True, append=False):
+        self.path = path
+        self.block_size = max(ALIGNMENT, block_size - block_size % ALIGNMENT)
+        self.fsync_every = fsync_every
+        self.drop_cache = drop_cache and hasattr(os, 'posix_fadvise')
+
+        flags = os.O_WRONLY | os.O_CREAT | (0 if append else os.O_TRUNC)
+        position = os.path.getsize(path) if append and os.path.exists(path) else 0
+        self.direct = False
+        # O_DIRECT writes must start at an aligned file offset
+        if direct and hasattr(os, 'O_DIRECT') and position % ALIGNMENT == 0:
+            try:
+                self.fd = os.open(path, flags | os.O_DIRECT, 0o644)
+                self.direct = True
+            except OSError:
+                print(f"[INFO] O_DIRECT not supported for {path}, using buffered writes")
+        if not self.direct:
+            self.fd = os.open(path, flags, 0o644)
+        os.lseek(self.fd, position, os.SEEK_SET)
+
+        # Anonymous mmap memory is page aligned, as O_DIRECT requires
+        self.buffer = mmap.mmap(-1, self.block_size)
+        self.buffered = 0
+        self.position = position
+        self.synced = position
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def preallocate(self, size):
+        """Reserve size bytes on disk for the file."""
+        if size > 0 and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self.fd, 0, size)
+            except OSError:
+                pass
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            n = min(len(view), self.block_size - self.buffered)
+            self.buffer[self.buffered:self.buffered + n] = view[:n]
+            self.buffered += n
+            view = view[n:]
+            if self.buffered == self.block_size:
+                self._write_buffer()
+        return len(data)
+
+    def tell(self):
+        return self.position + self.buffered
+
+    def seek(self, offset):
+        """Move to offset, writing out buffered data first."""
+        self._write_buffer(final=True)
+        os.lseek(self.fd, offset, os.SEEK_SET)
+        self.position = offset
+        self.synced = min(self.synced, offset)
+        return offset
+
+    def truncate(self):
+        self._write_buffer(final=True)
+        os.ftruncate(self.fd, self.position)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        self._write_buffer(final=True)
+        # Drop any preallocated space beyond the data actually written
+        os.ftruncate(self.fd, self.position)
+        self._sync()
+        os.close(self.fd)
+        self.buffer.close()
+        self.closed = True
+
+    def _write_buffer(self, final=False):
+        """Write the buffered bytes; a partial block is written only when final."""
+        if not self.buffered or (self.buffered < self.block_size and not final):
+            return
+
+        aligned = self.buffered - self.buffered % ALIGNMENT
+        view = memoryview(self.buffer)
+        try:
+            if aligned:
+                self._write_all(view[:aligned])
+            if aligned < self.buffered:
+                # The unaligned tail cannot go through O_DIRECT
+                self._set_direct(False)
+                self._write_all(view[aligned:self.buffered])
+                self._set_direct(True)
+        finally:
+            view.release()
+
+        self.position += self.buffered
+        self.buffered = 0
+
+        if self.fsync_every and self.position - self.synced >= self.fsync_every:
+            self._sync()
+
+    def _write_all(self, view):
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
+
+    def _set_direct(self, enabled):
+        if not self.direct:
+            return
+        import fcntl
+        flags = fcntl.fcntl(self.fd, fcntl.F_GETFL)
+        flags = flags | os.O_DIRECT if enabled else flags & ~os.O_DIRECT
+        fcntl.fcntl(self.fd, fcntl.F_SETFL, flags)
+
+    def _sync(self):
+        """fsync the data written since the last sync and drop it from the page cache."""
+        if self.position <= self.synced:
+            return
+        os.fsync(self.fd)
+        if self.drop_cache:
+            os.posix_fadvise(self.fd, self.synced, self.position - self.synced, os.POSIX_FADV_DONTNEED)
+        self.synced = self.position
+
+
+def buffered_writer(path, append=False):
+    """Default writer: a plain buffered file, as rec_download always used."""
+    return open(path, 'ab' if append else 'wb')
+
+
+def export_writer(**options):
+    """Return a writer factory producing ExportWriter(path, **options)."""
+    return lambda path, append=False: ExportWriter(path, append=append, **options)